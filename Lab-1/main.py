@@ -1,6 +1,12 @@
+import os
 import random
+import sys
 from collections import deque
 
+# the word counting helpers live next to the lab folders, shared with the other automata lab
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from automata_counting import WordCounting  # noqa: E402
+
 class Grammar:
     # Defining in the constructor my terminals, non-terminals, production rules, and initial state S
     def __init__(self):
@@ -29,7 +35,7 @@ class Grammar:
         return FiniteAutomaton(self)
 
 
-class FiniteAutomaton:
+class FiniteAutomaton(WordCounting):
     # Defining in the constructor my finite automaton components
     def __init__(self, grammar):
         self.states = grammar.VN.union({'F'})
@@ -70,6 +76,28 @@ class FiniteAutomaton:
 
         return False
 
+    # Subset construction into a transfer matrix: entry [i][j] counts the symbols leading from i to j.
+    # Counting paths only gives word counts once the automaton is deterministic.
+    def _count_matrix(self):
+        start = frozenset([self.start_state])
+        index = {start: 0}
+        queue = deque([start])
+        edges = []
+        while queue:
+            current = queue.popleft()
+            for symbol in sorted(self.alphabet):
+                nxt = frozenset(t for s in current for t in self.transitions.get(s, {}).get(symbol, []))
+                if nxt:
+                    if nxt not in index:
+                        index[nxt] = len(index)
+                        queue.append(nxt)
+                    edges.append((index[current], index[nxt]))
+        matrix = [[0] * len(index) for _ in index]
+        for i, j in edges:
+            matrix[i][j] += 1
+        finals = {i for subset, i in index.items() if subset & self.final_states}
+        return matrix, 0, finals
+
 
 def main():
     grammar = Grammar()
@@ -85,6 +113,11 @@ def main():
         is_true = fa.string_in_language(s)
         print(f"'{s}' belongs to the language: {is_true}")
 
+    print("\nNumber of words by length:")
+    for n in (5, 10, 100):
+        print(f"length {n}: {fa.count_words(n)}, up to {n}: {fa.count_words_upto(n)}")
+    print("Growth:", fa.growth_summary())
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,241 @@
+import mmap
+import struct
+import sys
+
+from main import FiniteAutomaton
+
+# Compile-once automaton artifacts: a definition file is parsed and determinized once,
+# then written as a binary file that is mmap'd and matched against without any parsing.
+# usage: python artifact.py compile definition.txt automaton.lfad
+#        python artifact.py match automaton.lfad word [word ...]
+#
+# Definition files hold either a right-linear grammar
+#     S -> cI
+#     I -> bJ | fI | eK | e
+# (the first left-hand side is the start symbol) or an automaton
+#     start q0
+#     final q4
+#     q0 a q1
+#
+# Artifact layout (little endian):
+#     header    magic 'LFAD', version, flags, state count, symbol count, start state,
+#               offsets of the alphabet, transition table and final-state bitmap
+#     alphabet  symbols as length-prefixed utf-8, then a 256-entry byte -> column map
+#     table     state count * symbol count uint32 targets, NO_TRANSITION where missing
+#     finals    one bit per state
+
+MAGIC = b'LFAD'
+VERSION = 1
+FLAG_BYTE_ALPHABET = 1  # every symbol is one byte, so the byte map can be used
+NO_TRANSITION = 0xFFFFFFFF
+NO_COLUMN = 0xFF
+_HEADER = struct.Struct('<4sHHIIIQQQ')
+
+
+def parse_definition(text):
+    lines = [line.split('#', 1)[0].strip() for line in text.splitlines()]
+    lines = [line for line in lines if line]
+    if any('->' in line for line in lines):
+        return _grammar_automaton(lines)
+    return _listed_automaton(lines)
+
+
+def _grammar_automaton(lines):
+    # same construction as Lab-1: 'aB' goes to B on a, a lone terminal goes to the final state
+    final = '<final>'
+    start = None
+    transitions = []
+    alphabet = set()
+    for line in lines:
+        head, _, body = line.partition('->')
+        head = head.strip()
+        start = start or head
+        for prod in body.split('|'):
+            prod = prod.strip()
+            if not prod:
+                raise ValueError(f"empty production for {head}")
+            alphabet.add(prod[0])
+            transitions.append({"state": head, "symbol": prod[0], "to": prod[1:] or final})
+    states = {start, final} | {t["state"] for t in transitions} | {t["to"] for t in transitions}
+    return FiniteAutomaton(states, alphabet, start, {final}, transitions)
+
+
+def _listed_automaton(lines):
+    start = None
+    finals = set()
+    transitions = []
+    for line in lines:
+        parts = line.split()
+        if parts[0] == 'start' and len(parts) == 2:
+            start = parts[1]
+        elif parts[0] == 'final':
+            finals.update(parts[1:])
+        elif len(parts) == 3:
+            transitions.append({"state": parts[0], "symbol": parts[1], "to": parts[2]})
+        else:
+            raise ValueError(f"cannot parse definition line: {line!r}")
+    if start is None:
+        raise ValueError("definition has no 'start' line")
+    states = {start} | finals | {t["state"] for t in transitions} | {t["to"] for t in transitions}
+    return FiniteAutomaton(states, {t["symbol"] for t in transitions}, start, finals, transitions)
+
+
+def compile_automaton(fa, path):
+    dfa = fa.convert_to_dfa()
+    # start state first, the rest in a stable order
+    states = [dfa.initial_state] + sorted(s for s in dfa.states if s != dfa.initial_state)
+    state_index = {state: i for i, state in enumerate(states)}
+    symbols = sorted(dfa.alphabet)
+    column = {symbol: i for i, symbol in enumerate(symbols)}
+
+    table = [NO_TRANSITION] * (len(states) * len(symbols))
+    for t in dfa.transitions:
+        table[state_index[t["state"]] * len(symbols) + column[t["symbol"]]] = state_index[t["to"]]
+    finals = bytearray((len(states) + 7) // 8)
+    for state in dfa.final_states:
+        i = state_index[state]
+        finals[i >> 3] |= 1 << (i & 7)
+
+    encoded = [s.encode('utf-8') for s in symbols]
+    flags = FLAG_BYTE_ALPHABET if all(len(e) == 1 for e in encoded) and len(symbols) < NO_COLUMN else 0
+    byte_map = bytearray([NO_COLUMN] * 256)
+    if flags & FLAG_BYTE_ALPHABET:
+        for i, e in enumerate(encoded):
+            byte_map[e[0]] = i
+    alphabet = b''.join(struct.pack('<I', len(e)) + e for e in encoded) + bytes(byte_map)
+
+    alphabet_offset = _HEADER.size
+    table_offset = (alphabet_offset + len(alphabet) + 7) & ~7  # aligned for the uint32 view
+    finals_offset = table_offset + 4 * len(table)
+    with open(path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, flags, len(states), len(symbols), 0,
+                             alphabet_offset, table_offset, finals_offset))
+        f.write(alphabet)
+        f.write(bytes(table_offset - alphabet_offset - len(alphabet)))
+        f.write(struct.pack(f'<{len(table)}I', *table))
+        f.write(finals)
+    return len(states)
+
+
+class CompiledAutomaton:
+    """mmap-backed view of an artifact; opening costs the same whatever the automaton's size."""
+
+    def __init__(self, path):
+        if sys.byteorder != 'little':
+            raise RuntimeError("artifacts are little endian and are read through a native uint32 view")
+        with open(path, 'rb') as f:
+            if f.seek(0, 2) < _HEADER.size:
+                raise ValueError(f"{path} is too short to be an automaton artifact")
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self.symbols, byte_map_offset, table_offset, finals_offset = self._check_layout(path)
+        except BaseException:
+            self._mm.close()  # no views exist yet, so the map can still be closed
+            raise
+        view = self._view = memoryview(self._mm)
+        self.table = view[table_offset:finals_offset].cast('I')
+        self.finals = view[finals_offset:finals_offset + (self.num_states + 7) // 8]
+        self.byte_map = view[byte_map_offset:byte_map_offset + 256]
+        self.columns = {symbol: i for i, symbol in enumerate(self.symbols)}
+
+    def _check_layout(self, path):
+        # everything the views and accepts() rely on is checked against the file before any view
+        # is taken, so a corrupt file fails here instead of as a short slice later; table targets are
+        # not scanned so opening stays independent of the automaton's size, accepts() reports bad ones
+        mm = self._mm
+        (magic, version, self.flags, self.num_states, self.num_symbols, self.start,
+         alphabet_offset, table_offset, finals_offset) = _HEADER.unpack_from(mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an automaton artifact")
+        if version != VERSION:
+            raise ValueError(f"unsupported artifact version {version}")
+        if not _HEADER.size <= alphabet_offset <= table_offset <= finals_offset:
+            raise ValueError(f"{path} has inconsistent section offsets")
+        if finals_offset - table_offset != 4 * self.num_states * self.num_symbols:
+            raise ValueError(f"{path} has a transition table of the wrong size")
+        if finals_offset + (self.num_states + 7) // 8 > len(mm):
+            raise ValueError(f"{path} is truncated")
+        if self.start >= self.num_states:
+            raise ValueError(f"{path} has start state {self.start} out of range")
+        symbols = []
+        pos = alphabet_offset
+        for _ in range(self.num_symbols):
+            if pos + 4 > table_offset:
+                raise ValueError(f"{path} has a truncated alphabet")
+            (length,) = struct.unpack_from('<I', mm, pos)
+            if pos + 4 + length > table_offset:
+                raise ValueError(f"{path} has a truncated alphabet")
+            symbols.append(mm[pos + 4:pos + 4 + length].decode('utf-8'))
+            pos += 4 + length
+        if pos + 256 > table_offset:
+            raise ValueError(f"{path} has a truncated alphabet")
+        if any(col != NO_COLUMN and col >= self.num_symbols for col in mm[pos:pos + 256]):
+            raise ValueError(f"{path} maps bytes to columns out of range")
+        return symbols, pos, table_offset, finals_offset
+
+    def is_final(self, state):
+        return bool(self.finals[state >> 3] & (1 << (state & 7)))
+
+    def accepts(self, word):
+        table, width, columns = self.table, self.num_symbols, self.columns
+        state = self.start
+        try:
+            for symbol in word:
+                col = columns.get(symbol)
+                if col is None:
+                    return False
+                state = table[state * width + col]
+                if state == NO_TRANSITION:
+                    return False
+            return self.is_final(state)
+        except IndexError:
+            raise ValueError(f"corrupt artifact: transition to state {state} out of range") from None
+
+    def accepts_bytes(self, data):
+        if not self.flags & FLAG_BYTE_ALPHABET:
+            raise ValueError("alphabet has multi-byte symbols, use accepts() on text")
+        table, width, byte_map = self.table, self.num_symbols, self.byte_map
+        state = self.start
+        try:
+            for b in data:
+                col = byte_map[b]
+                if col == NO_COLUMN:
+                    return False
+                state = table[state * width + col]
+                if state == NO_TRANSITION:
+                    return False
+            return self.is_final(state)
+        except IndexError:
+            raise ValueError(f"corrupt artifact: transition to state {state} out of range") from None
+
+    def close(self):
+        self.table.release()
+        self.finals.release()
+        self.byte_map.release()
+        self._view.release()
+        self._mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == 'compile':
+        with open(sys.argv[2], encoding='utf-8') as f:
+            fa = parse_definition(f.read())
+        count = compile_automaton(fa, sys.argv[3])
+        print(f"wrote {sys.argv[3]}: {count} dfa states, {len(fa.alphabet)} symbols")
+    elif len(sys.argv) >= 3 and sys.argv[1] == 'match':
+        with CompiledAutomaton(sys.argv[2]) as automaton:
+            for word in sys.argv[3:]:
+                print(f"'{word}' accepted: {automaton.accepts(word)}")
+    else:
+        print("usage: python artifact.py compile <definition> <artifact> | match <artifact> <word>...")
+        sys.exit(2)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,11 @@
+import os
+import sys
+
+# the word counting helpers live next to the lab folders, shared with the other automata lab
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from automata_counting import WordCounting  # noqa: E402
+
+
 class Grammar:
     def __init__(self, non_terminals, terminals, productions, start_symbol):
         self.non_terminals = non_terminals
@@ -28,7 +36,7 @@ class Grammar:
         return "grammar type"
 
 
-class FiniteAutomaton:
+class FiniteAutomaton(WordCounting):
     def __init__(self, states, alphabet, initial_state, final_states, transitions):
         self.states = states
         self.alphabet = alphabet
@@ -98,6 +106,16 @@ class FiniteAutomaton:
         dfa_final_states = {state_mapping[s] for s in dfa_states if any(st in self.final_states for st in s)}
         return FiniteAutomaton(dfa_state_names, self.alphabet, "q0", dfa_final_states, dfa_transitions)
 
+    # dfa as a transfer matrix: entry [i][j] is the number of symbols leading from state i to j
+    def _count_matrix(self):
+        dfa = self.convert_to_dfa()
+        states = sorted(dfa.states)
+        index = {state: i for i, state in enumerate(states)}
+        matrix = [[0] * len(states) for _ in states]
+        for t in dfa.transitions:
+            matrix[index[t["state"]]][index[t["to"]]] += 1
+        return matrix, index[dfa.initial_state], {index[f] for f in dfa.final_states}
+
 
 def variant6_fa():
     states = {"q0", "q1", "q2", "q3", "q4"}
@@ -143,6 +161,12 @@ def main():
     for t in sorted(dfa.transitions, key=lambda x: (x["state"], x["symbol"])):
         print(t)
 
+    # count accepted words by length straight from the dfa transfer matrix
+    print("\nword counts:")
+    for n in (5, 10, 100):
+        print(f"  length {n}: {dfa.count_words(n)}, up to {n}: {dfa.count_words_upto(n)}")
+    print("  growth:", dfa.growth_summary())
+
     # grammar classification based on our regular grammar check
     print("\ngrammar classification:")
     print(rg.return_grammar_type())
@@ -0,0 +1,202 @@
+import mmap
+import sys
+
+from artifact import parse_definition
+
+# Unanchored search: finds the substrings of a (possibly huge) text that an automaton accepts.
+# usage: python search.py definition.txt file [--all] [--stats]
+#
+# A forward DFA for Σ*L (the NFA start state is re-added after every symbol) finds where matches
+# end in a single left-to-right pass; a DFA for the reversed language then walks back from each
+# end to find where the match starts. Both DFAs are built lazily, one subset per new state.
+
+
+class LazyDFA:
+    def __init__(self, delta, start, accept, unanchored):
+        self.delta = delta              # (nfa state, unit) -> set of nfa states
+        self.accept = accept            # nfa states that make a subset accepting
+        self.sticky = frozenset(start) if unanchored else frozenset()
+        self.subsets = []
+        self.ids = {}
+        self.trans = []                 # per dfa state: unit -> dfa state
+        self.accepting = []
+        self.start = self._state(frozenset(start))
+        self.dead = self._state(frozenset()) if not unanchored else None
+
+    def _state(self, subset):
+        state = self.ids.get(subset)
+        if state is None:
+            state = self.ids[subset] = len(self.subsets)
+            self.subsets.append(subset)
+            self.trans.append({})
+            self.accepting.append(not subset.isdisjoint(self.accept))
+        return state
+
+    def step(self, state, unit):
+        nxt = set(self.sticky)
+        for s in self.subsets[state]:
+            nxt.update(self.delta.get((s, unit), ()))
+        target = self.trans[state][unit] = self._state(frozenset(nxt))
+        return target
+
+
+class SearchStats:
+    """Opt-in counters for one search; pass an instance to search() to fill it."""
+    def __init__(self):
+        self.states_visited = 0     # distinct dfa states entered, forward and reverse
+        self.transitions_taken = 0  # dfa transitions followed, forward and reverse
+        self.max_frontier = 0       # largest nfa subset behind any visited dfa state
+        self.reverse_scans = 0
+        self.matches = 0
+        self._seen = set()
+
+    def visit(self, dfa, state):
+        key = (id(dfa), state)
+        if key not in self._seen:
+            self._seen.add(key)
+            self.states_visited += 1
+            self.max_frontier = max(self.max_frontier, len(dfa.subsets[state]))
+
+    def __repr__(self):
+        return (f"SearchStats(states_visited={self.states_visited}, transitions_taken={self.transitions_taken}, "
+                f"max_frontier={self.max_frontier}, reverse_scans={self.reverse_scans}, matches={self.matches})")
+
+
+class Searcher:
+    def __init__(self, fa, binary=True):
+        # bytes are searched as ints, text as characters, so symbols are converted once up front
+        def unit(symbol):
+            if not binary:
+                return symbol
+            encoded = symbol.encode('utf-8')
+            if len(encoded) != 1:
+                raise ValueError(f"symbol {symbol!r} is not a single byte, search text instead of bytes")
+            return encoded[0]
+
+        forward, backward = {}, {}
+        for t in fa.transitions:
+            u = unit(t["symbol"])
+            forward.setdefault((t["state"], u), set()).add(t["to"])
+            backward.setdefault((t["to"], u), set()).add(t["state"])
+        self.forward = LazyDFA(forward, {fa.initial_state}, fa.final_states, unanchored=True)
+        self.reverse = LazyDFA(backward, fa.final_states, {fa.initial_state}, unanchored=False)
+
+    def _starts(self, data, end, lower):
+        # walk the reverse dfa back from `end`; yields match starts from right to left
+        rev = self.reverse
+        trans, accepting, dead = rev.trans, rev.accepting, rev.dead
+        state = rev.start
+        for j in range(end - 1, lower - 1, -1):
+            unit = data[j]
+            nxt = trans[state].get(unit)
+            state = nxt if nxt is not None else rev.step(state, unit)
+            if state == dead:
+                return
+            if accepting[state]:
+                yield j
+
+    def _starts_counted(self, data, end, lower, stats):
+        # same walk as _starts() with the counters, for _search_counted()
+        rev = self.reverse
+        trans, accepting, dead = rev.trans, rev.accepting, rev.dead
+        state = rev.start
+        stats.reverse_scans += 1
+        stats.visit(rev, state)
+        for j in range(end - 1, lower - 1, -1):
+            unit = data[j]
+            nxt = trans[state].get(unit)
+            state = nxt if nxt is not None else rev.step(state, unit)
+            stats.transitions_taken += 1
+            stats.visit(rev, state)
+            if state == dead:
+                return
+            if accepting[state]:
+                yield j
+
+    def search(self, data, overlapping=False, stats=None):
+        """
+        Yield (start, end) for non-empty matches in data (bytes-like or str, matching `binary`).
+        Default: non-overlapping, each reported at its earliest end with the leftmost start
+        after the previous match. overlapping=True yields every matching (start, end) pair.
+        """
+        if stats is not None:
+            yield from self._search_counted(data, overlapping, stats)
+            return
+        fwd = self.forward
+        trans, accepting = fwd.trans, fwd.accepting
+        state = fwd.start
+        lower = 0
+        for i, unit in enumerate(data):
+            nxt = trans[state].get(unit)
+            state = nxt if nxt is not None else fwd.step(state, unit)
+            if accepting[state]:
+                end = i + 1
+                if overlapping:
+                    yield from ((s, end) for s in reversed(list(self._starts(data, end, 0))))
+                else:
+                    start = None
+                    for start in self._starts(data, end, lower):
+                        pass
+                    if start is not None:
+                        yield start, end
+                        lower = end
+                        state = fwd.start  # the next match may only begin here
+
+    def _search_counted(self, data, overlapping, stats):
+        # same loop as search() with the counters; kept apart so the plain path pays nothing
+        fwd = self.forward
+        trans, accepting = fwd.trans, fwd.accepting
+        state = fwd.start
+        stats.visit(fwd, state)
+        lower = 0
+        for i, unit in enumerate(data):
+            nxt = trans[state].get(unit)
+            state = nxt if nxt is not None else fwd.step(state, unit)
+            stats.transitions_taken += 1
+            stats.visit(fwd, state)
+            if accepting[state]:
+                end = i + 1
+                if overlapping:
+                    starts = list(self._starts_counted(data, end, 0, stats))
+                    stats.matches += len(starts)
+                    yield from ((s, end) for s in reversed(starts))
+                else:
+                    start = None
+                    for start in self._starts_counted(data, end, lower, stats):
+                        pass
+                    if start is not None:
+                        stats.matches += 1
+                        yield start, end
+                        lower = end
+                        state = fwd.start
+
+
+def search_file(fa, path, overlapping=False, stats=None):
+    """Search a file through mmap, so it never has to fit in memory as a bytes object."""
+    with open(path, 'rb') as f:
+        if f.seek(0, 2) == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            view = memoryview(mm)
+            try:
+                yield from Searcher(fa).search(view, overlapping, stats)
+            finally:
+                view.release()
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    if len(args) != 2:
+        print("usage: python search.py definition.txt file [--all] [--stats]")
+        sys.exit(2)
+    with open(args[0], encoding='utf-8') as f:
+        fa = parse_definition(f.read())
+    stats = SearchStats() if '--stats' in sys.argv else None
+    for start, end in search_file(fa, args[1], overlapping='--all' in sys.argv, stats=stats):
+        print(start, end)
+    if stats is not None:
+        print(stats, file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
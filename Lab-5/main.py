@@ -163,24 +163,24 @@ class CNFConverter:
         self.eliminate_inaccessible_symbols()
         print("\nAfter eliminating inaccessible symbols:")
         print(self.grammar)
-        new_grammar = Grammar(
-            non_terminals=self.grammar.non_terminals.copy(),
-            terminals=self.grammar.terminals.copy(),
-            start_symbol=self.grammar.start_symbol
-        )
         terminal_to_nt = {}
-        for terminal in self.grammar.terminals:
+        for terminal in sorted(self.grammar.terminals):
             new_nt = self.generate_new_non_terminal()
-            new_grammar.non_terminals.add(new_nt)
-            new_grammar.add_production(new_nt, terminal)
             terminal_to_nt[terminal] = new_nt
+        # rules are kept as symbol tuples until the end, so multi-character
+        # names like X12 never have to be split back out of a string
+        rules = {}
+        for terminal, new_nt in terminal_to_nt.items():
+            self.add_rule(rules, new_nt, (terminal,))
+        pair_to_nt = {}
+        requested_pairs = 0
         for nt, prods in self.grammar.productions.items():
             for prod in prods:
                 if prod == "":
                     if nt == self.grammar.start_symbol:
-                        new_grammar.add_production(nt, prod)
+                        self.add_rule(rules, nt, ())
                 elif len(prod) == 1 and prod in self.grammar.terminals:
-                    new_grammar.add_production(nt, prod)
+                    self.add_rule(rules, nt, (prod,))
                 else:
                     symbols = []
                     for symbol in prod:
@@ -189,13 +189,72 @@ class CNFConverter:
                         else:
                             symbols.append(symbol)
                     while len(symbols) > 2:
-                        new_nt = self.generate_new_non_terminal()
-                        new_grammar.non_terminals.add(new_nt)
-                        new_grammar.add_production(new_nt, symbols[-2] + symbols[-1])
-                        symbols = symbols[:-2] + [new_nt]
-                    new_grammar.add_production(nt, "".join(symbols))
+                        # identical pairs share one non-terminal instead of a fresh X each time
+                        pair = (symbols[-2], symbols[-1])
+                        requested_pairs += 1
+                        if pair not in pair_to_nt:
+                            pair_to_nt[pair] = self.generate_new_non_terminal()
+                            self.add_rule(rules, pair_to_nt[pair], pair)
+                        symbols = symbols[:-2] + [pair_to_nt[pair]]
+                    self.add_rule(rules, nt, tuple(symbols))
+        shared_size = self.grammar_size(rules)
+        rules, merged = self.merge_equivalent_non_terminals(rules)
+        print(f"Binarization pairs: {requested_pairs} requested, {len(pair_to_nt)} distinct")
+        print(f"Merged equivalent non-terminals: {merged}")
+        # without sharing every requested pair would have been its own non-terminal and production
+        reused = requested_pairs - len(pair_to_nt)
+        naive_size = (shared_size[0] + reused, shared_size[1] + reused)
+        final_size = self.grammar_size(rules)
+        print(f"CNF size: {naive_size[0]} -> {final_size[0]} non-terminals, "
+              f"{naive_size[1]} -> {final_size[1]} productions")
+        non_terminals = set(rules)
+        # the start symbol is None once the language turned out to be empty
+        if self.grammar.start_symbol is not None:
+            non_terminals.add(self.grammar.start_symbol)
+        new_grammar = Grammar(
+            non_terminals=non_terminals,
+            terminals=self.grammar.terminals.copy(),
+            start_symbol=self.grammar.start_symbol
+        )
+        for nt, bodies in rules.items():
+            for body in bodies:
+                new_grammar.add_production(nt, "".join(body))
         self.grammar = new_grammar
         return new_grammar
+    def add_rule(self, rules, non_terminal, symbols):
+        bodies = rules.setdefault(non_terminal, [])
+        if symbols not in bodies:
+            bodies.append(symbols)
+    def grammar_size(self, rules):
+        return len(rules), sum(len(bodies) for bodies in rules.values())
+    def merge_equivalent_non_terminals(self, rules):
+        # non-terminals with exactly the same set of bodies derive the same language,
+        # so all of them can be replaced by one representative (original names win over X's)
+        merged = {}
+        while True:
+            body_to_nt = {}
+            renames = {}
+            order = sorted(rules, key=lambda n: (n not in self.grammar.non_terminals, n))
+            for nt in order:
+                if nt == self.grammar.start_symbol:
+                    continue
+                key = frozenset(rules[nt])
+                if key in body_to_nt:
+                    renames[nt] = body_to_nt[key]
+                else:
+                    body_to_nt[key] = nt
+            if not renames:
+                return rules, merged
+            for old, new in merged.items():
+                merged[old] = renames.get(new, new)
+            merged.update(renames)
+            new_rules = {}
+            for nt, bodies in rules.items():
+                if nt in renames:
+                    continue
+                for body in bodies:
+                    self.add_rule(new_rules, nt, tuple(renames.get(symbol, symbol) for symbol in body))
+            rules = new_rules
 
 def main():
     # Variant 6
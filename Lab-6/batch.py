@@ -0,0 +1,183 @@
+import argparse
+import json
+import mmap
+import os
+import struct
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from main import Lexer, PrattParser, ast_to_json, dumps_ast, load_ast
+
+# Parses a file with one expression per line using a process pool.
+# usage: python batch.py expressions.txt out.jsonl [--format binary] [--workers N] [--errors errors.jsonl]
+#
+# Every input line, blank or not, produces exactly one output record, in input order:
+#   jsonl   {"line": n, "ast": {...}} | {"line": n, "error": "..."} | {"line": n, "blank": true}
+#   binary  line number (uint64 LE) and a status byte, followed by
+#             STATUS_AST:   one binary AST record (see dumps_ast in main.py)
+#             STATUS_ERROR: message length (uint32 LE) and the utf-8 message
+#             STATUS_BLANK: nothing
+#           read_binary_results() iterates over such a file.
+
+FORMATS = ('jsonl', 'binary')
+STATUS_AST, STATUS_ERROR, STATUS_BLANK = 0, 1, 2
+_RESULT_PREFIX = struct.Struct('<QB')
+_MESSAGE_LENGTH = struct.Struct('<I')
+
+
+def split_chunks(mm, chunk_bytes):
+    """Line-aligned (start, end, first_line) ranges covering the mapped file."""
+    chunks = []
+    start = 0
+    line = 1
+    size = len(mm)
+    while start < size:
+        end = mm.find(b'\n', min(start + chunk_bytes, size) - 1)
+        end = size if end == -1 else end + 1
+        chunks.append((start, end, line))
+        line += mm[start:end].count(b'\n')
+        start = end
+    return chunks
+
+
+def _encode_ast(fmt, line_no, text):
+    ast = PrattParser(Lexer(text)).parse()
+    if fmt == 'binary':
+        return _RESULT_PREFIX.pack(line_no, STATUS_AST) + dumps_ast(ast)
+    # ast_to_json does not recurse, so deeply nested formulas are written out like any other
+    return f'{{"line": {line_no}, "ast": {ast_to_json(ast)}}}\n'.encode('utf-8')
+
+
+def _encode_error(fmt, error):
+    if fmt == 'binary':
+        message = error["error"].encode('utf-8')
+        return _RESULT_PREFIX.pack(error["line"], STATUS_ERROR) + _MESSAGE_LENGTH.pack(len(message)) + message
+    return (json.dumps(error) + "\n").encode('utf-8')
+
+
+def _encode_blank(fmt, line_no):
+    if fmt == 'binary':
+        return _RESULT_PREFIX.pack(line_no, STATUS_BLANK)
+    return (json.dumps({"line": line_no, "blank": True}) + "\n").encode('utf-8')
+
+
+def parse_chunk(path, start, end, first_line, fmt):
+    """Worker: parse one chunk of the file, returns (output bytes, errors, stats)."""
+    began = time.perf_counter()
+    out = bytearray()
+    errors = []
+    lines = 0
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        data = mm[start:end]
+    # split on b'\n' only, so line numbers agree with the newline count used by split_chunks
+    raw_lines = data.split(b'\n')
+    if data.endswith(b'\n'):
+        raw_lines.pop()
+    for line_no, raw in enumerate(raw_lines, first_line):
+        text = raw.decode('utf-8', errors='replace').strip()
+        if not text:
+            out += _encode_blank(fmt, line_no)
+            continue
+        lines += 1
+        try:
+            out += _encode_ast(fmt, line_no, text)
+        except Exception as e:  # one bad line must not stop the batch
+            errors.append({"line": line_no, "error": f"{type(e).__name__}: {e}"})
+            out += _encode_error(fmt, errors[-1])
+    stats = {"pid": os.getpid(), "lines": lines, "bytes": end - start, "seconds": time.perf_counter() - began}
+    return bytes(out), errors, stats
+
+
+def read_binary_results(f):
+    """Yield (line, status, AST or error message or None) from a binary output file."""
+    while True:
+        prefix = f.read(_RESULT_PREFIX.size)
+        if not prefix:
+            return
+        if len(prefix) != _RESULT_PREFIX.size:
+            raise ValueError("Truncated result record")
+        line_no, status = _RESULT_PREFIX.unpack(prefix)
+        if status == STATUS_AST:
+            ast = load_ast(f)
+            if ast is None:
+                raise ValueError(f"Missing AST record for line {line_no}")
+            yield line_no, status, ast
+        elif status == STATUS_ERROR:
+            raw_length = f.read(_MESSAGE_LENGTH.size)
+            if len(raw_length) != _MESSAGE_LENGTH.size:
+                raise ValueError("Truncated result record")
+            (length,) = _MESSAGE_LENGTH.unpack(raw_length)
+            message = f.read(length)
+            if len(message) != length:
+                raise ValueError("Truncated result record")
+            yield line_no, status, message.decode('utf-8')
+        elif status == STATUS_BLANK:
+            yield line_no, status, None
+        else:
+            raise ValueError(f"Unknown result status {status} for line {line_no}")
+
+
+def parse_file(input_path, output_path, fmt='jsonl', workers=None, chunk_bytes=1 << 20, errors_path=None):
+    """
+    Parse input_path and write exactly one record per input line to output_path, in input order:
+    an AST, an error or a blank-line placeholder, tagged with the line number. JSONL records are
+    {"line", "ast"}, {"line", "error"} or {"line", "blank"}; binary records are a line number and
+    status prefix followed by the payload (see the format notes at the top of this file).
+    Returns a summary with the errors and per-worker throughput.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown output format: {fmt}")
+    began = time.perf_counter()
+    with open(input_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            chunks = []
+        else:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                chunks = split_chunks(mm, chunk_bytes)
+
+    errors = []
+    per_worker = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool, open(output_path, 'wb') as out:
+        results = pool.map(parse_chunk, *zip(*[(input_path, s, e, line, fmt) for s, e, line in chunks]))
+        # map yields in submission order, so output stays in input order
+        for data, chunk_errors, stats in results:
+            out.write(data)
+            errors.extend(chunk_errors)
+            totals = per_worker.setdefault(stats["pid"], {"lines": 0, "bytes": 0, "seconds": 0.0})
+            for key in totals:
+                totals[key] += stats[key]
+
+    if errors_path is not None:
+        with open(errors_path, 'w', encoding='utf-8') as f:
+            for error in errors:
+                f.write(json.dumps(error) + "\n")
+    return {
+        "chunks": len(chunks),
+        "lines": sum(w["lines"] for w in per_worker.values()),
+        "errors": errors,
+        "seconds": time.perf_counter() - began,
+        "workers": per_worker,
+    }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Batch-parse newline-delimited expressions.")
+    arg_parser.add_argument("input")
+    arg_parser.add_argument("output")
+    arg_parser.add_argument("--format", choices=FORMATS, default='jsonl')
+    arg_parser.add_argument("--workers", type=int, default=None)
+    arg_parser.add_argument("--chunk-bytes", type=int, default=1 << 20)
+    arg_parser.add_argument("--errors", default=None, help="also write parse errors to this JSONL file")
+    args = arg_parser.parse_args()
+
+    summary = parse_file(args.input, args.output, args.format, args.workers, args.chunk_bytes, args.errors)
+    print(f"parsed {summary['lines']} lines in {summary['chunks']} chunks, "
+          f"{len(summary['errors'])} errors, {summary['seconds']:.2f}s")
+    for pid, w in sorted(summary["workers"].items()):
+        rate = w["lines"] / w["seconds"] if w["seconds"] else 0.0
+        mb_rate = w["bytes"] / w["seconds"] / 1e6 if w["seconds"] else 0.0
+        print(f"  worker {pid}: {w['lines']} lines, {rate:,.0f} lines/s, {mb_rate:.2f} MB/s")
+
+
+if __name__ == '__main__':
+    main()
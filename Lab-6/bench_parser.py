@@ -0,0 +1,59 @@
+import sys
+import time
+
+from main import Lexer, Parser, PrattParser
+
+# compares the recursive-descent Parser with the stack-based PrattParser
+# usage: python bench_parser.py [max_bytes]
+
+
+def flat_expression(size):
+    parts = []
+    total = 0
+    i = 0
+    while total < size:
+        part = f"sin(x{i % 97}) * {i} - {i}.5j / y"
+        parts.append(part)
+        total += len(part) + 3
+        i += 1
+    return " + ".join(parts)
+
+
+def nested_expression(depth):
+    return "(" * depth + "x" + ")" * depth
+
+
+def unary_chain(length):
+    return "- " * length + "x"
+
+
+def time_parse(parser_cls, text):
+    start = time.perf_counter()
+    try:
+        parser_cls(Lexer(text)).parse()
+    except RecursionError:
+        return None
+    return time.perf_counter() - start
+
+
+def main():
+    max_bytes = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    workloads = [
+        ("flat", flat_expression),
+        ("nested", nested_expression),
+        ("unary", unary_chain),
+    ]
+    print(f"{'workload':<10}{'size':>10}{'bytes':>10}{'recursive (s)':>16}{'pratt (s)':>12}")
+    for name, make in workloads:
+        size = 1000
+        while size <= max_bytes:
+            text = make(size if name == "flat" else size // 2)
+            recursive = time_parse(Parser, text)
+            pratt = time_parse(PrattParser, text)
+            shown = f"{recursive:.4f}" if recursive is not None else "RecursionError"
+            print(f"{name:<10}{size:>10}{len(text):>10}{shown:>16}{pratt:>12.4f}")
+            size *= 10
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+
+# Local load generator for server.py: keeps a fixed number of requests in flight
+# over a few connections and reports client-side p50/p99 and the server's histogram.
+# usage: python loadgen.py [--requests 20000] [--concurrency 256] [--connections 4] [--mode eval]
+
+EXPRESSIONS = [
+    "sin(30) + cos(45.0) - tan(1.57) + 3 + 4j - 2.5j",
+    "sin(cos(45) + tan(30)) * (3 + 4) - 5j / (2 - 1.5)",
+    "cos(sin(60) * tan(30)) + (7.2 - 3j) * (4 + 5.5)",
+    "(1 + 4j) * (2 - 3j) + sin(0.25) * cos(1.5) - tan(0.75)",
+    "x * x - 2 * x * y + y * y",
+]
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(p / 100 * len(sorted_values)))
+    return sorted_values[index]
+
+
+async def run_connection(host, port, count, concurrency, mode, latencies):
+    reader, writer = await asyncio.open_connection(host, port, limit=1 << 24)
+    sent_at = {}
+    done = asyncio.Event()
+    slots = asyncio.Semaphore(concurrency)
+
+    async def read_responses():
+        received = 0
+        while received < count:
+            line = await reader.readline()
+            if not line:
+                break
+            response = json.loads(line)
+            latencies.append(time.perf_counter() - sent_at.pop(response["id"]))
+            slots.release()
+            received += 1
+        done.set()
+
+    receiver = asyncio.create_task(read_responses())
+    for i in range(count):
+        await slots.acquire()
+        request = {"id": i, "expr": random.choice(EXPRESSIONS), "mode": mode,
+                   "vars": {"x": random.random(), "y": random.random()}}
+        sent_at[i] = time.perf_counter()
+        writer.write((json.dumps(request) + "\n").encode('utf-8'))
+        await writer.drain()
+    await done.wait()
+    await receiver
+    writer.close()
+
+
+async def fetch_stats(host, port):
+    reader, writer = await asyncio.open_connection(host, port, limit=1 << 24)
+    writer.write(b'{"stats": true}\n')
+    await writer.drain()
+    stats = json.loads(await reader.readline())["stats"]
+    writer.close()
+    return stats
+
+
+async def main_async(args):
+    latencies = []
+    per_connection = args.requests // args.connections
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        run_connection(args.host, args.port, per_connection, max(1, args.concurrency // args.connections),
+                       args.mode, latencies)
+        for _ in range(args.connections)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    print(f"{len(latencies)} requests in {elapsed:.2f}s ({len(latencies) / elapsed:,.0f} req/s)")
+    print(f"client p50 {percentile(latencies, 50) * 1e3:.2f} ms, "
+          f"p99 {percentile(latencies, 99) * 1e3:.2f} ms, max {latencies[-1] * 1e3:.2f} ms")
+    stats = await fetch_stats(args.host, args.port)
+    latency = stats["latency"]
+    print(f"server p50 {latency['p50_ms']:.2f} ms, p99 {latency['p99_ms']:.2f} ms, "
+          f"{stats['batches']} batches, mean batch size {stats['mean_batch_size']:.1f}")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Load generator for server.py.")
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8765)
+    arg_parser.add_argument("--requests", type=int, default=20_000)
+    arg_parser.add_argument("--concurrency", type=int, default=256)
+    arg_parser.add_argument("--connections", type=int, default=4)
+    arg_parser.add_argument("--mode", choices=("ast", "eval"), default="eval")
+    asyncio.run(main_async(arg_parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
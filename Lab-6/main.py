@@ -1,6 +1,21 @@
 import re
 import enum
-from typing import NamedTuple, List, Optional, Union
+import math
+import cmath
+import io
+import json
+import operator
+import struct
+import sys
+import threading
+from array import array
+from collections import OrderedDict
+from typing import BinaryIO, Callable, Dict, NamedTuple, List, Optional, Sequence, TextIO, Union
+
+try:
+    import numpy as np
+except ImportError:  # evaluation still works on plain scalars without numpy
+    np = None
 
 class TokenType(enum.Enum):
     INTEGER      = "INTEGER"
@@ -42,33 +57,31 @@ class Lexer:
         (None,                 r'(?P<ws>\s+)'),
     ]
     _master_pat = re.compile('|'.join(p for _, p in _specs))
+    # group name -> token type, built once so a match is dispatched with one dict lookup
+    _group_types = {pat[4:pat.index('>')]: tok_type for tok_type, pat in _specs}
+    _converters = {TokenType.INTEGER: int, TokenType.FLOAT: float, TokenType.COMPLEX: complex}
 
     def __init__(self, text: str):
+        self._text = text
+        self._pos = 0
         self._scanner = Lexer._master_pat.scanner(text)
         self.next_token: Token = self._advance()
 
     def _advance(self) -> Token:
-        m = self._scanner.match()
-        if not m:
-            return Token(TokenType.EOF, None)
-        typ = None
-        for tok_type, _ in self._specs:
-            name = tok_type.name.lower() if tok_type else 'ws'
-            if m.lastgroup == name:
-                typ = tok_type
+        # loop instead of recursing over whitespace, so long inputs can't hit the recursion limit
+        while True:
+            m = self._scanner.match()
+            if not m:
+                if self._pos < len(self._text):
+                    raise SyntaxError(f"Unexpected character {self._text[self._pos]!r} at offset {self._pos}")
+                return Token(TokenType.EOF, None)
+            self._pos = m.end()
+            typ = self._group_types[m.lastgroup]
+            if typ is not None:
                 break
-        if typ is None:
-            return self._advance()
-        txt = m.group(m.lastgroup)
-        if typ is TokenType.INTEGER:
-            val = int(txt)
-        elif typ is TokenType.FLOAT:
-            val = float(txt)
-        elif typ is TokenType.COMPLEX:
-            val = complex(txt)
-        else:
-            val = txt
-        return Token(typ, val)
+        conv = self._converters.get(typ)
+        txt = m.group()
+        return Token(typ, _convert(conv, txt, m.start()) if conv else txt)
 
     def eat(self, typ: TokenType) -> Token:
         cur = self.next_token
@@ -77,47 +90,211 @@ class Lexer:
             return cur
         raise SyntaxError(f"Expected {typ}, got {cur.type}")
 
-class AST: pass
+def _convert(conv, txt, offset):
+    # e.g. int() refuses literals over sys.get_int_max_str_digits(); report it like any other lexing error
+    try:
+        return conv(txt)
+    except ValueError as e:
+        raise SyntaxError(f"Invalid number literal at offset {offset}: {e}") from None
+
+class TokenArrays(NamedTuple):
+    types: array     # index of the token's type in TOKEN_TYPES
+    starts: array
+    ends: array
+    values: list
+
+
+TOKEN_TYPES = list(TokenType)
+_group_codes = {name: (TOKEN_TYPES.index(t) if t else -1) for name, t in Lexer._group_types.items()}
+_code_converters = {TOKEN_TYPES.index(t): conv for t, conv in Lexer._converters.items()}
+
+def tokenize_all(text: str) -> TokenArrays:
+    """Lex the whole text at once into parallel arrays (no EOF entry, no Token objects)."""
+    types, starts, ends, values = array('B'), array('q'), array('q'), []
+    scanner = Lexer._master_pat.scanner(text)
+    match, group_codes, converters = scanner.match, _group_codes, _code_converters
+    pos = 0
+    for m in iter(match, None):
+        code = group_codes[m.lastgroup]
+        start, pos = m.span()
+        if code < 0:
+            continue
+        txt = m.group()
+        conv = converters.get(code)
+        types.append(code)
+        starts.append(start)
+        ends.append(pos)
+        values.append(_convert(conv, txt, start) if conv else txt)
+    if pos < len(text):
+        raise SyntaxError(f"Unexpected character {text[pos]!r} at offset {pos}")
+    return TokenArrays(types, starts, ends, values)
+
+_BINARY_OPS = {
+    TokenType.PLUS: operator.add,
+    TokenType.MINUS: operator.sub,
+    TokenType.MULTIPLY: operator.mul,
+    TokenType.DIVIDE: operator.truediv,
+}
+_UNARY_OPS = {TokenType.PLUS: operator.pos, TokenType.MINUS: operator.neg}
+_OP_SYMBOLS = {TokenType.PLUS: '+', TokenType.MINUS: '-', TokenType.MULTIPLY: '*', TokenType.DIVIDE: '/'}
+_set = object.__setattr__
+
+class AST:
+    # nodes are slotted and immutable; equality and hash are structural, so
+    # equal subtrees can be interned and shared (see NodeFactory)
+    __slots__ = ('_hash',)
+
+    def __init__(self, *args):
+        _set(self, '_hash', hash((type(self),) + self._key()))
+
+    def _args(self) -> tuple:
+        raise NotImplementedError
+
+    def _key(self) -> tuple:
+        return self._args()
+
+    def __eq__(self, other):
+        # explicit stack so trees too deep for recursion can still be compared
+        stack = [(self, other)]
+        while stack:
+            a, b = stack.pop()
+            if a is b:
+                continue
+            if type(a) is not type(b) or a._hash != b._hash:
+                return False
+            for x, y in zip(a._key(), b._key()):
+                if isinstance(x, AST):
+                    stack.append((x, y))
+                elif isinstance(x, tuple) and type(y) is tuple and len(x) == len(y):
+                    stack.extend(zip(x, y))
+                elif x != y:
+                    return False
+        return True
+
+    def __hash__(self):
+        return self._hash
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} nodes are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} nodes are immutable")
+
+    def __reduce__(self):
+        # pickle through the binary AST format, which is iterative, so trees of any depth
+        # can cross process boundaries (plain pickling would recurse once per level)
+        return loads_ast, (dumps_ast(self),)
 
 class Number(AST):
+    __slots__ = ('value',)
     def __init__(self, value: Union[int, float]):
-        self.value = value
+        _set(self, 'value', value)
+        super().__init__()
+    def _args(self):
+        return (self.value,)
+    def _key(self):
+        # 1, 1.0 and -0.0/0.0 compare equal but must stay distinct nodes; ints are keyed by
+        # value since repr() refuses ints longer than sys.get_int_max_str_digits()
+        if type(self.value) is int:
+            return int, self.value
+        return type(self.value), repr(self.value)
     def __repr__(self):
         return f"Number({self.value})"
 
 class ComplexNumber(AST):
+    __slots__ = ('value',)
     def __init__(self, value: complex):
-        self.value = value
+        _set(self, 'value', value)
+        super().__init__()
+    def _args(self):
+        return (self.value,)
+    def _key(self):
+        return (repr(self.value),)
     def __repr__(self):
         return f"Complex({self.value})"
 
 class Identifier(AST):
+    __slots__ = ('name',)
     def __init__(self, name: str):
-        self.name = name
+        _set(self, 'name', name)
+        super().__init__()
+    def _args(self):
+        return (self.name,)
     def __repr__(self):
         return f"Ident({self.name})"
 
 class BinOp(AST):
+    __slots__ = ('left', 'op', 'right')
     def __init__(self, left: AST, op: Token, right: AST):
-        self.left, self.op, self.right = left, op, right
+        _set(self, 'left', left)
+        _set(self, 'op', op)
+        _set(self, 'right', right)
+        super().__init__()
+    def _args(self):
+        return self.left, self.op, self.right
     def __repr__(self):
         return f"BinOp({self.left}, {self.op.type.name}, {self.right})"
 
 class UnaryOp(AST):
+    __slots__ = ('op', 'expr')
     def __init__(self, op: Token, expr: AST):
-        self.op, self.expr = op, expr
+        _set(self, 'op', op)
+        _set(self, 'expr', expr)
+        super().__init__()
+    def _args(self):
+        return self.op, self.expr
     def __repr__(self):
         return f"UnaryOp({self.op.type.name}, {self.expr})"
 
 class FunctionCall(AST):
-    def __init__(self, func_name: str, args: List[AST]):
-        self.func_name, self.args = func_name, args
+    __slots__ = ('func_name', 'args')
+    def __init__(self, func_name: str, args: Sequence[AST]):
+        _set(self, 'func_name', func_name)
+        _set(self, 'args', tuple(args))
+        super().__init__()
+    def _args(self):
+        return self.func_name, self.args
     def __repr__(self):
-        return f"Call({self.func_name}, {self.args})"
+        return f"Call({self.func_name}, {list(self.args)})"
+
+class NodeFactory:
+    """Builds nodes through an intern table so structurally equal subtrees are one object."""
+    def __init__(self):
+        self._nodes: Dict[AST, AST] = {}
+
+    def __call__(self, cls, *args) -> AST:
+        node = cls(*args)
+        return self._nodes.setdefault(node, node)
+
+    def __len__(self):
+        return len(self._nodes)
+
+_FOLDABLE = (Number, ComplexNumber)
 
 class Parser:
-    def __init__(self, lexer: Lexer):
+    def __init__(self, lexer: Lexer, factory: Optional[NodeFactory] = None, fold_constants: bool = False):
         self.lexer = lexer
+        # pass one factory to several parsers to share subtrees across formulas
+        self.make = factory if factory is not None else NodeFactory()
+        self.fold_constants = fold_constants
+
+    def _constant(self, value) -> AST:
+        if isinstance(value, complex):
+            return self.make(ComplexNumber, value)
+        return self.make(Number, value)
+
+    def _binop(self, left: AST, op: Token, right: AST) -> AST:
+        if self.fold_constants and isinstance(left, _FOLDABLE) and isinstance(right, _FOLDABLE):
+            try:
+                return self._constant(_BINARY_OPS[op.type](left.value, right.value))
+            except (ZeroDivisionError, OverflowError):
+                pass  # keep the node so the error surfaces at evaluation time
+        return self.make(BinOp, left, op, right)
+
+    def _unaryop(self, op: Token, expr: AST) -> AST:
+        if self.fold_constants and isinstance(expr, _FOLDABLE):
+            return self._constant(_UNARY_OPS[op.type](expr.value))
+        return self.make(UnaryOp, op, expr)
 
     def parse(self) -> AST:
         node = self.expr()
@@ -130,7 +307,7 @@ class Parser:
         while self.lexer.next_token.type in (TokenType.PLUS, TokenType.MINUS):
             op = self.lexer.next_token
             self.lexer.eat(op.type)
-            node = BinOp(node, op, self.term())
+            node = self._binop(node, op, self.term())
         return node
 
     def term(self) -> AST:
@@ -138,24 +315,24 @@ class Parser:
         while self.lexer.next_token.type in (TokenType.MULTIPLY, TokenType.DIVIDE):
             op = self.lexer.next_token
             self.lexer.eat(op.type)
-            node = BinOp(node, op, self.factor())
+            node = self._binop(node, op, self.factor())
         return node
 
     def factor(self) -> AST:
         tok = self.lexer.next_token
         if tok.type in (TokenType.PLUS, TokenType.MINUS):
             self.lexer.eat(tok.type)
-            return UnaryOp(tok, self.factor())
+            return self._unaryop(tok, self.factor())
 
         if tok.type is TokenType.INTEGER:
             self.lexer.eat(TokenType.INTEGER)
-            return Number(tok.value)
+            return self.make(Number, tok.value)
         if tok.type is TokenType.FLOAT:
             self.lexer.eat(TokenType.FLOAT)
-            return Number(tok.value)
+            return self.make(Number, tok.value)
         if tok.type is TokenType.COMPLEX:
             self.lexer.eat(TokenType.COMPLEX)
-            return ComplexNumber(tok.value)
+            return self.make(ComplexNumber, tok.value)
 
         if tok.type in (TokenType.SIN, TokenType.COS, TokenType.TAN, TokenType.IDENTIFIER):
             name = tok.value
@@ -169,9 +346,9 @@ class Parser:
                         self.lexer.eat(TokenType.COMMA)
                         args.append(self.expr())
                 self.lexer.eat(TokenType.RPAREN)
-                return FunctionCall(name, args)
+                return self.make(FunctionCall, name, args)
             else:
-                return Identifier(name)
+                return self.make(Identifier, name)
 
         if tok.type is TokenType.LPAREN:
             self.lexer.eat(TokenType.LPAREN)
@@ -181,31 +358,637 @@ class Parser:
 
         raise SyntaxError(f"Unexpected token {tok}")
 
-def ast_to_string(node: AST, indent: int = 0) -> str:
-    prefix = '  ' * indent
+_BINARY_PRECEDENCE = {
+    TokenType.PLUS: 1, TokenType.MINUS: 1,
+    TokenType.MULTIPLY: 2, TokenType.DIVIDE: 2,
+}
+_NAME_TOKENS = (TokenType.SIN, TokenType.COS, TokenType.TAN, TokenType.IDENTIFIER)
+
+class _Call:
+    __slots__ = ('name', 'args')
+    def __init__(self, name: str):
+        self.name, self.args = name, []
+
+_PAREN = object()
+
+class PrattParser(Parser):
+    """
+    Precedence-climbing parser with explicit operator and operand stacks.
+    Builds the same AST as Parser but never recurses, so nesting depth and
+    unary chains are only limited by memory and parsing stays linear.
+    """
+    def parse(self) -> AST:
+        lexer = self.lexer
+        out: List[AST] = []
+        # entries: Token for binary/unary operators, _PAREN or a _Call for open groups
+        ops: list = []
+        unary: List[bool] = []  # parallel to ops, True for prefix +/-
+        expect_operand = True
+
+        def reduce_binary(prec: int):
+            while ops and not unary[-1] and isinstance(ops[-1], Token) and _BINARY_PRECEDENCE[ops[-1].type] >= prec:
+                op = ops.pop()
+                unary.pop()
+                right = out.pop()
+                out.append(self._binop(out.pop(), op, right))
+
+        def finish_operand(node: AST):
+            # prefix signs bind tighter than any binary operator
+            while unary and unary[-1]:
+                unary.pop()
+                node = self._unaryop(ops.pop(), node)
+            out.append(node)
+
+        while True:
+            tok = lexer.next_token
+            typ = tok.type
+            if expect_operand:
+                if typ in (TokenType.PLUS, TokenType.MINUS):
+                    lexer.eat(typ)
+                    ops.append(tok)
+                    unary.append(True)
+                elif typ is TokenType.INTEGER or typ is TokenType.FLOAT:
+                    lexer.eat(typ)
+                    finish_operand(self.make(Number, tok.value))
+                    expect_operand = False
+                elif typ is TokenType.COMPLEX:
+                    lexer.eat(typ)
+                    finish_operand(self.make(ComplexNumber, tok.value))
+                    expect_operand = False
+                elif typ in _NAME_TOKENS:
+                    lexer.eat(typ)
+                    if lexer.next_token.type is TokenType.LPAREN:
+                        lexer.eat(TokenType.LPAREN)
+                        if lexer.next_token.type is TokenType.RPAREN:
+                            lexer.eat(TokenType.RPAREN)
+                            finish_operand(self.make(FunctionCall, tok.value, ()))
+                            expect_operand = False
+                        else:
+                            ops.append(_Call(tok.value))
+                            unary.append(False)
+                    else:
+                        finish_operand(self.make(Identifier, tok.value))
+                        expect_operand = False
+                elif typ is TokenType.LPAREN:
+                    lexer.eat(typ)
+                    ops.append(_PAREN)
+                    unary.append(False)
+                else:
+                    raise SyntaxError(f"Unexpected token {tok}")
+                continue
+
+            if typ in _BINARY_PRECEDENCE:
+                reduce_binary(_BINARY_PRECEDENCE[typ])
+                lexer.eat(typ)
+                ops.append(tok)
+                unary.append(False)
+                expect_operand = True
+                continue
+            # everything else closes the pending binary operators of the innermost group
+            reduce_binary(0)
+            if typ is TokenType.COMMA and ops and isinstance(ops[-1], _Call):
+                lexer.eat(typ)
+                ops[-1].args.append(out.pop())
+                expect_operand = True
+            elif typ is TokenType.RPAREN and ops:
+                group = ops.pop()
+                unary.pop()
+                lexer.eat(typ)
+                if group is _PAREN:
+                    finish_operand(out.pop())
+                else:
+                    group.args.append(out.pop())
+                    finish_operand(self.make(FunctionCall, group.name, group.args))
+            elif ops:
+                raise SyntaxError(f"Expected {TokenType.RPAREN}, got {typ}")
+            elif typ is not TokenType.EOF:
+                raise SyntaxError("Unexpected token after expression")
+            else:
+                return out.pop()
+
+def _children(node: AST) -> tuple:
+    if isinstance(node, BinOp):
+        return node.left, node.right
+    if isinstance(node, UnaryOp):
+        return (node.expr,)
+    if isinstance(node, FunctionCall):
+        return node.args
+    return ()
+
+def approx_size(node: AST) -> int:
+    """Rough memory footprint of a tree in bytes, counting shared subtrees once."""
+    seen = set()
+    stack = [node]
+    total = 0
+    while stack:
+        n = stack.pop()
+        if id(n) in seen:
+            continue
+        seen.add(id(n))
+        total += sys.getsizeof(n)
+        stack.extend(_children(n))
+    return total
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    bytes: int
+
+class ParseCache:
+    """
+    LRU of text -> AST, bounded by entry count and/or approximate byte size.
+    Cached trees are immutable, so the same object is handed to every caller.
+    """
+    def __init__(self, max_entries: Optional[int] = 1024, max_bytes: Optional[int] = None,
+                 normalize_whitespace: bool = False, fold_constants: bool = False,
+                 parser_cls: type = Parser):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.normalize_whitespace = normalize_whitespace
+        self.fold_constants = fold_constants
+        self.parser_cls = parser_cls
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (ast, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def _key(self, text: str) -> str:
+        if self.normalize_whitespace:
+            # collapse runs instead of dropping them, "sin x" and "sinx" lex differently
+            return ' '.join(text.split())
+        return text
+
+    def get(self, text: str) -> AST:
+        key = self._key(text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        # parse outside the lock; errors propagate and are not cached
+        ast = self.parser_cls(Lexer(key), fold_constants=self.fold_constants).parse()
+        size = approx_size(ast) + sys.getsizeof(key)
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = (ast, size)
+                self._bytes += size
+                self._evict()
+        return ast
+
+    def _evict(self):
+        while self._entries and (
+                (self.max_entries is not None and len(self._entries) > self.max_entries)
+                or (self.max_bytes is not None and self._bytes > self.max_bytes)):
+            _, (_, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(self.hits, self.misses, self.evictions, len(self._entries), self._bytes)
+
+    def __len__(self):
+        return len(self._entries)
+
+# shared cache behind parse_cached(); replace or reconfigure it to change the bounds
+parse_cache = ParseCache()
+
+def parse_cached(text: str) -> AST:
+    return parse_cache.get(text)
+
+def _node_label(node: AST) -> str:
     if isinstance(node, Number):
-        return f"{prefix}Number({node.value})"
+        return f"Number({node.value})"
     if isinstance(node, ComplexNumber):
-        return f"{prefix}Complex({node.value})"
+        return f"Complex({node.value})"
     if isinstance(node, Identifier):
-        return f"{prefix}Ident({node.name})"
+        return f"Ident({node.name})"
     if isinstance(node, UnaryOp):
-        s = f"{prefix}UnaryOp({node.op.type.name})\n"
-        s += ast_to_string(node.expr, indent + 1)
-        return s
+        return f"UnaryOp({node.op.type.name})"
     if isinstance(node, BinOp):
-        s = f"{prefix}BinOp({node.op.type.name})\n"
-        s += ast_to_string(node.left, indent + 1) + "\n"
-        s += ast_to_string(node.right, indent + 1)
-        return s
+        return f"BinOp({node.op.type.name})"
     if isinstance(node, FunctionCall):
-        s = f"{prefix}Call({node.func_name})\n"
-        for i, arg in enumerate(node.args):
-            s += ast_to_string(arg, indent + 1)
-            if i != len(node.args) - 1:
-                s += "\n"
-        return s
-    return f"{prefix}{node}"
+        return f"Call({node.func_name})"
+    return f"{node}"
+
+def write_ast(node: AST, out: TextIO, indent: int = 0):
+    """Write the indented tree to any file-like object, one line per node, without recursion."""
+    stack = [(node, indent)]
+    first = True
+    while stack:
+        node, depth = stack.pop()
+        if not first:
+            out.write("\n")
+        first = False
+        out.write('  ' * depth)
+        out.write(_node_label(node))
+        stack.extend((child, depth + 1) for child in reversed(_children(node)))
+
+def ast_to_string(node: AST, indent: int = 0) -> str:
+    buf = io.StringIO()
+    write_ast(node, buf, indent)
+    return buf.getvalue()
+
+def ast_to_dict(node: AST) -> dict:
+    """JSON-friendly nested dicts, built bottom-up with an explicit stack."""
+    done: Dict[int, dict] = {}
+    stack = [(node, False)]
+    while stack:
+        n, expanded = stack.pop()
+        children = _children(n)
+        if children and not expanded:
+            stack.append((n, True))
+            stack.extend((child, False) for child in children)
+            continue
+        if isinstance(n, Number):
+            d = {"type": "Number", "value": n.value}
+        elif isinstance(n, ComplexNumber):
+            d = {"type": "Complex", "real": n.value.real, "imag": n.value.imag}
+        elif isinstance(n, Identifier):
+            d = {"type": "Ident", "name": n.name}
+        elif isinstance(n, UnaryOp):
+            d = {"type": "UnaryOp", "op": n.op.type.name, "expr": done[id(n.expr)]}
+        elif isinstance(n, BinOp):
+            d = {"type": "BinOp", "op": n.op.type.name, "left": done[id(n.left)], "right": done[id(n.right)]}
+        elif isinstance(n, FunctionCall):
+            d = {"type": "Call", "name": n.func_name, "args": [done[id(arg)] for arg in n.args]}
+        else:
+            raise TypeError(f"Cannot convert {n!r}")
+        done[id(n)] = d
+    return done[id(node)]
+
+def write_ast_json(node: AST, out: TextIO):
+    """Write json.dumps(ast_to_dict(node)) to out with an explicit stack, so nesting depth is not limited."""
+    dumps = json.dumps
+    stack = [node]
+    while stack:
+        n = stack.pop()
+        if isinstance(n, str):
+            out.write(n)
+        elif isinstance(n, UnaryOp):
+            out.write(f'{{"type": "UnaryOp", "op": "{n.op.type.name}", "expr": ')
+            stack += ('}', n.expr)
+        elif isinstance(n, BinOp):
+            out.write(f'{{"type": "BinOp", "op": "{n.op.type.name}", "left": ')
+            stack += ('}', n.right, ', "right": ', n.left)
+        elif isinstance(n, FunctionCall):
+            out.write(f'{{"type": "Call", "name": {dumps(n.func_name)}, "args": [')
+            stack.append(']}')
+            for i in range(len(n.args) - 1, -1, -1):
+                stack.append(n.args[i])
+                if i:
+                    stack.append(', ')
+        else:
+            # leaves are shallow, json.dumps gives them the exact same form
+            out.write(dumps(ast_to_dict(n)))
+
+def ast_to_json(node: AST) -> str:
+    buf = io.StringIO()
+    write_ast_json(node, buf)
+    return buf.getvalue()
+
+# Binary AST format: one record per tree
+#   b'LAST' | version byte | body length (uint64 LE) | body
+#   body = string table (varint count, then varint length + utf-8 bytes each)
+#          followed by the nodes in pre-order, each starting with a node-type byte
+AST_MAGIC = b'LAST'
+AST_FORMAT_VERSION = 1
+_HEADER = struct.Struct('<4sBQ')
+_DOUBLE = struct.Struct('<d')
+_COMPLEX = struct.Struct('<dd')
+
+NODE_INT, NODE_FLOAT, NODE_COMPLEX, NODE_IDENT = 1, 2, 3, 4
+NODE_POS, NODE_NEG = 5, 6
+NODE_ADD, NODE_SUB, NODE_MUL, NODE_DIV = 7, 8, 9, 10
+NODE_CALL = 11
+
+_UNARY_CODES = {TokenType.PLUS: NODE_POS, TokenType.MINUS: NODE_NEG}
+_BINARY_CODES = {TokenType.PLUS: NODE_ADD, TokenType.MINUS: NODE_SUB,
+                 TokenType.MULTIPLY: NODE_MUL, TokenType.DIVIDE: NODE_DIV}
+_CODE_TOKENS = {code: Token(typ, _OP_SYMBOLS[typ]) for codes in (_UNARY_CODES, _BINARY_CODES)
+                for typ, code in codes.items()}
+
+def _write_varint(buf: bytearray, n: int):
+    while n > 0x7f:
+        buf.append((n & 0x7f) | 0x80)
+        n >>= 7
+    buf.append(n)
+
+def _read_varint(data: bytes, pos: int):
+    n = shift = 0
+    while True:
+        b = data[pos]
+        pos += 1
+        n |= (b & 0x7f) << shift
+        if b < 0x80:
+            return n, pos
+        shift += 7
+
+def dumps_ast(node: AST) -> bytes:
+    strings: Dict[str, int] = {}
+    nodes = bytearray()
+    stack = [node]
+    while stack:
+        n = stack.pop()
+        if isinstance(n, Number) and type(n.value) is int:
+            nodes.append(NODE_INT)
+            # zigzag keeps small negatives short; python ints have no size limit
+            _write_varint(nodes, n.value * 2 if n.value >= 0 else -n.value * 2 - 1)
+        elif isinstance(n, Number):
+            nodes.append(NODE_FLOAT)
+            nodes += _DOUBLE.pack(n.value)
+        elif isinstance(n, ComplexNumber):
+            nodes.append(NODE_COMPLEX)
+            nodes += _COMPLEX.pack(n.value.real, n.value.imag)
+        elif isinstance(n, Identifier):
+            nodes.append(NODE_IDENT)
+            _write_varint(nodes, strings.setdefault(n.name, len(strings)))
+        elif isinstance(n, UnaryOp):
+            nodes.append(_UNARY_CODES[n.op.type])
+            stack.append(n.expr)
+        elif isinstance(n, BinOp):
+            nodes.append(_BINARY_CODES[n.op.type])
+            stack.append(n.right)
+            stack.append(n.left)
+        elif isinstance(n, FunctionCall):
+            nodes.append(NODE_CALL)
+            _write_varint(nodes, strings.setdefault(n.func_name, len(strings)))
+            _write_varint(nodes, len(n.args))
+            stack.extend(reversed(n.args))
+        else:
+            raise TypeError(f"Cannot serialize {n!r}")
+    body = bytearray()
+    _write_varint(body, len(strings))
+    for name in strings:  # dicts keep insertion order, which matches the indices
+        encoded = name.encode('utf-8')
+        _write_varint(body, len(encoded))
+        body += encoded
+    body += nodes
+    return _HEADER.pack(AST_MAGIC, AST_FORMAT_VERSION, len(body)) + bytes(body)
+
+def dump_ast(node: AST, out: BinaryIO):
+    out.write(dumps_ast(node))
+
+def _decode_body(data: bytes, factory: NodeFactory) -> AST:
+    try:
+        return _decode_nodes(data, factory)
+    except (IndexError, struct.error):
+        # reading past the end of the body or an out-of-range string index
+        raise ValueError("Truncated or corrupt AST record") from None
+
+def _decode_nodes(data: bytes, factory: NodeFactory) -> AST:
+    count, pos = _read_varint(data, 0)
+    strings = []
+    for _ in range(count):
+        length, pos = _read_varint(data, pos)
+        strings.append(data[pos:pos + length].decode('utf-8'))
+        pos += length
+    # frames of interior nodes still waiting for children: [code, extra, needed, children]
+    frames: list = []
+    while True:
+        code = data[pos]
+        pos += 1
+        if code == NODE_INT:
+            z, pos = _read_varint(data, pos)
+            node = factory(Number, z >> 1 if not z & 1 else -((z + 1) >> 1))
+        elif code == NODE_FLOAT:
+            node = factory(Number, _DOUBLE.unpack_from(data, pos)[0])
+            pos += _DOUBLE.size
+        elif code == NODE_COMPLEX:
+            real, imag = _COMPLEX.unpack_from(data, pos)
+            node = factory(ComplexNumber, complex(real, imag))
+            pos += _COMPLEX.size
+        elif code == NODE_IDENT:
+            index, pos = _read_varint(data, pos)
+            node = factory(Identifier, strings[index])
+        elif code in (NODE_POS, NODE_NEG):
+            frames.append([code, None, 1, []])
+            continue
+        elif NODE_ADD <= code <= NODE_DIV:
+            frames.append([code, None, 2, []])
+            continue
+        elif code == NODE_CALL:
+            index, pos = _read_varint(data, pos)
+            argc, pos = _read_varint(data, pos)
+            if argc:
+                frames.append([code, strings[index], argc, []])
+                continue
+            node = factory(FunctionCall, strings[index], ())
+        else:
+            raise ValueError(f"Unknown node type {code} at offset {pos - 1}")
+        # a leaf completed: close every frame that now has all its children
+        while frames:
+            frame = frames[-1]
+            frame[3].append(node)
+            if len(frame[3]) < frame[2]:
+                break
+            frames.pop()
+            code, extra, _, children = frame
+            if code == NODE_CALL:
+                node = factory(FunctionCall, extra, children)
+            elif frame[2] == 1:
+                node = factory(UnaryOp, _CODE_TOKENS[code], children[0])
+            else:
+                node = factory(BinOp, children[0], _CODE_TOKENS[code], children[1])
+        if not frames:
+            if pos != len(data):
+                raise ValueError("Trailing bytes after AST record")
+            return node
+
+def _check_header(header: bytes) -> int:
+    if len(header) != _HEADER.size:
+        raise ValueError("Truncated AST record")
+    magic, version, length = _HEADER.unpack(header)
+    if magic != AST_MAGIC:
+        raise ValueError("Not a binary AST record")
+    if version != AST_FORMAT_VERSION:
+        raise ValueError(f"Unsupported AST format version {version}")
+    return length
+
+def loads_ast(data: bytes, factory: Optional[NodeFactory] = None) -> AST:
+    length = _check_header(data[:_HEADER.size])
+    body = data[_HEADER.size:_HEADER.size + length]
+    if len(body) != length:
+        raise ValueError("Truncated AST record")
+    return _decode_body(body, factory if factory is not None else NodeFactory())
+
+def load_ast(inp: BinaryIO, factory: Optional[NodeFactory] = None) -> Optional[AST]:
+    """Read the next record from a binary stream; returns None at end of stream."""
+    header = inp.read(_HEADER.size)
+    if not header:
+        return None
+    if len(header) != _HEADER.size:
+        raise ValueError("Truncated AST record")
+    length = _check_header(header)
+    body = inp.read(length)
+    if len(body) != length:
+        raise ValueError("Truncated AST record")
+    return _decode_body(body, factory if factory is not None else NodeFactory())
+
+def _scalar_func(real_fn, complex_fn):
+    return lambda v: complex_fn(v) if isinstance(v, complex) else real_fn(v)
+
+# sin/cos/tan become ufuncs when numpy is available, so one call covers a whole column
+if np is not None:
+    FUNCTIONS: Dict[str, Callable] = {'sin': np.sin, 'cos': np.cos, 'tan': np.tan}
+else:
+    FUNCTIONS = {
+        'sin': _scalar_func(math.sin, cmath.sin),
+        'cos': _scalar_func(math.cos, cmath.cos),
+        'tan': _scalar_func(math.tan, cmath.tan),
+    }
+
+
+def _lookup_function(name: str, nargs: int, functions: Dict[str, Callable]) -> Callable:
+    if name not in functions:
+        raise NameError(f"Unknown function {name}")
+    if name in FUNCTIONS and nargs != 1:
+        raise TypeError(f"{name}() takes exactly one argument ({nargs} given)")
+    return functions[name]
+
+def _post_order(node: AST):
+    # children before parents, left to right, without recursion
+    stack = [(node, False)]
+    while stack:
+        n, expanded = stack.pop()
+        children = _children(n)
+        if children and not expanded:
+            stack.append((n, True))
+            stack.extend((child, False) for child in reversed(children))
+        else:
+            yield n
+
+_PUSH_CONST, _PUSH_NAME, _APPLY_UNARY, _APPLY_BINARY, _APPLY_CALL = range(5)
+
+def _compile_closure(node: AST, functions: Dict[str, Callable]) -> Callable:
+    # flatten the tree into a postfix program once; evaluation is then a loop over it,
+    # so neither compiling nor running depends on the depth of the tree
+    program = []
+    for n in _post_order(node):
+        if isinstance(n, (Number, ComplexNumber)):
+            program.append((_PUSH_CONST, n.value))
+        elif isinstance(n, Identifier):
+            program.append((_PUSH_NAME, n.name))
+        elif isinstance(n, UnaryOp):
+            program.append((_APPLY_UNARY, _UNARY_OPS[n.op.type]))
+        elif isinstance(n, BinOp):
+            program.append((_APPLY_BINARY, _BINARY_OPS[n.op.type]))
+        elif isinstance(n, FunctionCall):
+            program.append((_APPLY_CALL, (_lookup_function(n.func_name, len(n.args), functions), len(n.args))))
+        else:
+            raise TypeError(f"Cannot compile {n!r}")
+
+    def run(env):
+        stack = []
+        push = stack.append
+        for code, arg in program:
+            if code == _PUSH_CONST:
+                push(arg)
+            elif code == _PUSH_NAME:
+                push(env[arg])
+            elif code == _APPLY_BINARY:
+                right = stack.pop()
+                stack[-1] = arg(stack[-1], right)
+            elif code == _APPLY_UNARY:
+                stack[-1] = arg(stack[-1])
+            else:
+                fn, nargs = arg
+                if nargs:
+                    args = stack[-nargs:]
+                    del stack[-nargs:]
+                    push(fn(*args))
+                else:
+                    push(fn())
+        return stack[0]
+    return run
+
+# precedence of generated python expressions, used to emit only the parentheses they need
+_ATOM, _UNARY, _PRODUCT, _SUM = 4, 3, 2, 1
+_SOURCE_PRECEDENCE = {TokenType.PLUS: _SUM, TokenType.MINUS: _SUM,
+                      TokenType.MULTIPLY: _PRODUCT, TokenType.DIVIDE: _PRODUCT}
+# deeper expressions are spilled into a temporary, which keeps the python compiler
+# well inside its own recursion limits however long or nested the formula is
+_MAX_SOURCE_DEPTH = 50
+
+def _compile_code(node: AST, functions: Dict[str, Callable]) -> Callable:
+    names: Dict[str, str] = {}  # formula identifier -> python local
+    funcs: Dict[str, str] = {}  # function name -> python global
+    globs: dict = {}
+    lines: List[str] = []
+    done: Dict[int, tuple] = {}  # id(node) -> (source, precedence, depth)
+
+    def wrap(part, needed):
+        text, prec, _ = part
+        return f"({text})" if prec < needed else text
+
+    for n in _post_order(node):
+        if isinstance(n, (Number, ComplexNumber)):
+            try:
+                text = repr(n.value)
+            except ValueError:  # folded ints over the int/str conversion limit
+                text = None
+            if text is None or 'inf' in text or 'nan' in text:
+                # overflowed float literals and huge ints have no source form, pass them in as globals
+                text = f"c_{len(globs)}"
+                globs[text] = n.value
+            # folded constants can be negative, e.g. '-3' or '(-0-5j)'
+            result = (text, _UNARY if text.startswith('-') else _ATOM, 1)
+        elif isinstance(n, Identifier):
+            # positional local names: formula identifiers need not be valid (or NFKC-distinct) python names
+            result = (names.setdefault(n.name, f"v_{len(names)}"), _ATOM, 1)
+        elif isinstance(n, UnaryOp):
+            operand = done[id(n.expr)]
+            result = (f"{_OP_SYMBOLS[n.op.type]}{wrap(operand, _UNARY)}", _UNARY, operand[2] + 1)
+        elif isinstance(n, BinOp):
+            prec = _SOURCE_PRECEDENCE[n.op.type]
+            left, right = done[id(n.left)], done[id(n.right)]
+            # left-associative: the right operand needs parentheses at equal precedence
+            text = f"{wrap(left, prec)} {_OP_SYMBOLS[n.op.type]} {wrap(right, prec + 1)}"
+            result = (text, prec, max(left[2], right[2]) + 1)
+        elif isinstance(n, FunctionCall):
+            if n.func_name not in funcs:
+                funcs[n.func_name] = f"f_{len(funcs)}"
+            globs[funcs[n.func_name]] = _lookup_function(n.func_name, len(n.args), functions)
+            args = [done[id(arg)] for arg in n.args]
+            text = f"{funcs[n.func_name]}({', '.join(a[0] for a in args)})"
+            result = (text, _ATOM, max((a[2] for a in args), default=0) + 1)
+        else:
+            raise TypeError(f"Cannot compile {n!r}")
+        if result[2] > _MAX_SOURCE_DEPTH:
+            temp = f"t_{len(lines)}"
+            lines.append(f"    {temp} = {result[0]}")
+            result = (temp, _ATOM, 1)
+        done[id(n)] = result
+
+    loads = [f"    {local} = env[{name!r}]" for name, local in names.items()]
+    source = "\n".join(["def _formula(env):"] + loads + lines + [f"    return {done[id(node)][0]}"]) + "\n"
+    exec(compile(source, "<formula>", "exec"), globs)
+    return globs["_formula"]
+
+def compile_ast(node: AST, mode: str = 'closure', functions: Optional[Dict[str, Callable]] = None) -> Callable:
+    """
+    Compile an AST once into a callable taking the identifier bindings as keyword arguments.
+    mode='closure' runs a flat postfix program in a loop, mode='code' generates a Python code object.
+    Bindings may be numpy arrays, in which case the whole column is evaluated in one call.
+    """
+    table = dict(FUNCTIONS, **functions) if functions else FUNCTIONS
+    if mode == 'closure':
+        fn = _compile_closure(node, table)
+    elif mode == 'code':
+        fn = _compile_code(node, table)
+    else:
+        raise ValueError(f"Unknown compile mode: {mode}")
+    return lambda **bindings: fn(bindings)
 
 if __name__ == '__main__':
     text = input("Enter expression ▶ ")
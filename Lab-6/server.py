@@ -0,0 +1,265 @@
+import argparse
+import asyncio
+import bisect
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from main import PrattParser, Lexer, ast_to_json, compile_ast
+
+# Asyncio parse/evaluate service around the Lab-6 parser.
+# Protocol: one JSON object per line, e.g.
+#   {"id": 1, "expr": "sin(x) + 2", "mode": "eval", "vars": {"x": 0.5}}  ->  {"id": 1, "value": 2.479...}
+#   {"id": 2, "expr": "1 + 2"}                                          ->  {"id": 2, "ast": {...}}
+#   {"stats": true}                                                      ->  latency histogram
+# usage: python server.py [--port 8765 | --stdio] [--batch-size 64] [--batch-window-ms 2]
+
+
+def _json_value(value):
+    if isinstance(value, complex):
+        return {"real": value.real, "imag": value.imag}
+    return value
+
+
+def _error(e):
+    return json.dumps({"error": f"{type(e).__name__}: {e}"})
+
+
+def _with_id(response, request_id):
+    """Put the request id in front of an encoded response object without decoding it again."""
+    return f'{{"id": {json.dumps(request_id)}, {response[1:]}'
+
+
+async def _ready(response):
+    return response
+
+
+async def _reply(future, request_id):
+    return _with_id(await future, request_id)
+
+
+def process_batch(items):
+    """Worker: parse (and optionally evaluate) a batch of (expr, mode, vars) tuples.
+
+    Each result is encoded to a JSON string here (ASTs without recursion, so deep trees are fine),
+    so anything that fails for one item becomes that item's error and the strings sent back to
+    the server always pickle.
+    """
+    results = []
+    for expr, mode, variables in items:
+        try:
+            ast = PrattParser(Lexer(expr)).parse()
+            if mode == 'eval':
+                results.append(json.dumps({"value": _json_value(compile_ast(ast)(**variables))}))
+            else:
+                results.append(f'{{"ast": {ast_to_json(ast)}}}')
+        except Exception as e:  # the error goes back to the caller instead of killing the batch
+            results.append(_error(e))
+    return results
+
+
+class LatencyHistogram:
+    """Log-spaced latency buckets (10 per decade, 10 µs .. 100 s)."""
+    def __init__(self):
+        self.bounds = [1e-5 * 10 ** (i / 10) for i in range(71)]
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0
+        self.max = 0.0
+
+    def record(self, seconds):
+        self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.total += 1
+        self.max = max(self.max, seconds)
+
+    def percentile(self, p):
+        if not self.total:
+            return 0.0
+        rank = p / 100 * self.total
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return min(self.bounds[i], self.max) if i < len(self.bounds) else self.max
+        return self.max
+
+    def snapshot(self):
+        return {
+            "count": self.total,
+            "p50_ms": self.percentile(50) * 1e3,
+            "p90_ms": self.percentile(90) * 1e3,
+            "p99_ms": self.percentile(99) * 1e3,
+            "max_ms": self.max * 1e3,
+            "buckets_ms": {f"{self.bounds[i] * 1e3:.3g}": c for i, c in enumerate(self.counts[:-1]) if c},
+        }
+
+
+class ParseService:
+    def __init__(self, batch_size=64, batch_window=0.002, max_pending=10_000, workers=None,
+                 reject_when_full=False):
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.reject_when_full = reject_when_full
+        # a bounded queue is the backpressure: readers wait on put() once it is full
+        self.queue = asyncio.Queue(maxsize=max_pending)
+        self.pool = ProcessPoolExecutor(max_workers=workers)
+        self.in_flight = asyncio.Semaphore(workers or os.cpu_count() or 1)
+        self.latency = LatencyHistogram()
+        self.batches = 0
+        self.rejected = 0
+
+    async def enqueue(self, expr, mode='ast', variables=None):
+        """Queue one request and return the future of its encoded response.
+
+        Waits while the queue is full, which is what pushes back on a fast client.
+        """
+        future = asyncio.get_running_loop().create_future()
+        if self.reject_when_full and self.queue.full():
+            self.rejected += 1
+            future.set_result(json.dumps({"error": "overloaded"}))
+            return future
+        await self.queue.put(((expr, mode, variables or {}), future, time.perf_counter()))
+        return future
+
+    async def submit(self, expr, mode='ast', variables=None):
+        return await (await self.enqueue(expr, mode, variables))
+
+    async def run_batcher(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self.in_flight.acquire()
+            loop.create_task(self._dispatch(batch))
+
+    async def _dispatch(self, batch):
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self.pool, process_batch, [item for item, _, _ in batch])
+        except Exception as e:
+            results = [_error(e)] * len(batch)
+        finally:
+            self.in_flight.release()
+        now = time.perf_counter()
+        self.batches += 1
+        for (_, future, started), result in zip(batch, results):
+            self.latency.record(now - started)
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self):
+        return {
+            "latency": self.latency.snapshot(),
+            "batches": self.batches,
+            "mean_batch_size": self.latency.total / self.batches if self.batches else 0.0,
+            "queued": self.queue.qsize(),
+            "rejected": self.rejected,
+        }
+
+    async def accept(self, line):
+        """Decode one request line and queue it; returns an awaitable for the response line."""
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as e:
+            return _ready(json.dumps({"error": f"bad request: {e}"}))
+        if not isinstance(request, dict):
+            request = {"expr": str(request)}
+        if request.get("stats"):
+            return _ready(json.dumps({"id": request.get("id"), "stats": self.stats()}))
+        future = await self.enqueue(str(request.get("expr", "")), request.get("mode", "ast"), request.get("vars"))
+        return _reply(future, request.get("id"))
+
+    async def handle_line(self, line):
+        return await (await self.accept(line))
+
+    async def handle_connection(self, reader, writer):
+        write_lock = asyncio.Lock()
+        pending = set()
+
+        async def respond(reply):
+            response = await reply
+            async with write_lock:
+                writer.write((response + "\n").encode('utf-8'))
+                await writer.drain()
+
+        try:
+            while line := await reader.readline():
+                if line.strip():
+                    # accept() waits for a queue slot, so a full queue stops reading and pushes back on the client;
+                    # responses may come back out of order, clients match them by id
+                    task = asyncio.create_task(respond(await self.accept(line)))
+                    pending.add(task)
+                    task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.gather(*pending)
+        finally:
+            writer.close()
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+
+async def serve_stdio(service):
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    pending = set()
+
+    async def respond(reply):
+        print(await reply, flush=True)
+
+    # same as a socket connection: requests run concurrently so they can share batches
+    while line := await reader.readline():
+        if line.strip():
+            task = asyncio.create_task(respond(await service.accept(line)))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+    if pending:
+        await asyncio.gather(*pending)
+
+
+async def main_async(args):
+    service = ParseService(args.batch_size, args.batch_window_ms / 1000, args.max_pending, args.workers,
+                           args.reject_when_full)
+    batcher = asyncio.create_task(service.run_batcher())
+    try:
+        if args.stdio:
+            await serve_stdio(service)
+        else:
+            server = await asyncio.start_server(service.handle_connection, args.host, args.port, limit=1 << 24)
+            print(f"listening on {args.host}:{args.port}", file=sys.stderr)
+            async with server:
+                await server.serve_forever()
+    finally:
+        batcher.cancel()
+        service.close()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Micro-batching parse/evaluate service.")
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8765)
+    arg_parser.add_argument("--stdio", action="store_true", help="serve JSON lines on stdin/stdout instead")
+    arg_parser.add_argument("--batch-size", type=int, default=64)
+    arg_parser.add_argument("--batch-window-ms", type=float, default=2.0)
+    arg_parser.add_argument("--max-pending", type=int, default=10_000)
+    arg_parser.add_argument("--workers", type=int, default=None)
+    arg_parser.add_argument("--reject-when-full", action="store_true",
+                            help="answer 'overloaded' instead of waiting when the queue is full")
+    try:
+        asyncio.run(main_async(arg_parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
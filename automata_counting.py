@@ -0,0 +1,272 @@
+import math
+
+try:
+    import numpy as np
+except ImportError:  # counting falls back to pure python lists without numpy
+    np = None
+
+# Word counting for the finite automata of Lab-1 and Lab-2, from the transfer matrix of a DFA.
+# Matrices are lists of rows of python ints. The labs mix WordCounting into their FiniteAutomaton.
+#
+# Modes: "exact" (python big ints), "float" (approximate count as (mantissa, exponent), i.e.
+# mantissa * 10**exponent with 1 <= mantissa < 10, so it never overflows) or "mod" (counts modulo `modulus`).
+
+
+def _identity(size):
+    return [[int(i == j) for j in range(size)] for i in range(size)]
+
+
+def _mat_mul(a, b, modulus=None):
+    columns = list(zip(*b))
+    product = [[sum(x * y for x, y in zip(row, col)) for col in columns] for row in a]
+    if modulus:
+        product = [[x % modulus for x in row] for row in product]
+    return product
+
+
+def _mat_pow(matrix, exponent, mode="exact", modulus=None):
+    # repeated squaring, so only O(log n) matrix products are needed
+    if mode == "float":
+        return _mat_pow_scaled(matrix, exponent)
+    if mode == "mod" and np is not None and len(matrix) * (modulus - 1) ** 2 < 2 ** 63:
+        # int64 products can't overflow below that bound; bigger moduli take the python int loop below
+        result = np.identity(len(matrix), dtype=np.int64)
+        base = np.array(matrix, dtype=np.int64) % modulus
+        while exponent:
+            if exponent & 1:
+                result = (result @ base) % modulus
+            base = (base @ base) % modulus
+            exponent >>= 1
+        return result.tolist()
+    if mode in ("exact", "mod"):
+        result, base = _identity(len(matrix)), matrix
+        while exponent:
+            if exponent & 1:
+                result = _mat_mul(result, base, modulus)
+            base = _mat_mul(base, base, modulus)
+            exponent >>= 1
+        return result
+    raise ValueError(f"unknown counting mode: {mode}")
+
+
+def _normalize(matrix):
+    # divide by a power of two so the largest entry is below 1; returns (matrix, exponent taken out)
+    if np is not None:
+        largest = float(np.abs(matrix).max())
+    else:
+        largest = max(abs(x) for row in matrix for x in row)
+    if not largest:
+        return matrix, 0
+    shift = math.frexp(largest)[1]
+    if np is not None:
+        return np.ldexp(matrix, -shift), shift
+    return [[math.ldexp(x, -shift) for x in row] for row in matrix], shift
+
+
+def _mat_pow_scaled(matrix, exponent):
+    # float power kept as mantissa matrix * 2**scale: plain float64 powers overflow to inf and then
+    # produce nan from inf * 0, while the scale is a python int and never overflows.
+    # Entries much smaller than the largest one lose precision, so float mode is only approximate.
+    size = len(matrix)
+    if np is not None:
+        result, base = np.identity(size), np.array(matrix, dtype=np.float64)
+        multiply = np.matmul
+    else:
+        result = [[float(x) for x in row] for row in _identity(size)]
+        base = [[float(x) for x in row] for row in matrix]
+        multiply = _mat_mul
+    base, base_scale = _normalize(base)
+    scale = 0
+    while exponent:
+        if exponent & 1:
+            result, shift = _normalize(multiply(result, base))
+            scale += base_scale + shift
+        exponent >>= 1
+        if exponent:
+            base, shift = _normalize(multiply(base, base))
+            base_scale = 2 * base_scale + shift
+    if np is not None:
+        result = result.tolist()
+    return result, scale
+
+
+def _trim(matrix, start, finals):
+    # keep only states that are reachable from the start and can still reach a final state
+    size = len(matrix)
+    forward, stack = {start}, [start]
+    while stack:
+        i = stack.pop()
+        for j in range(size):
+            if matrix[i][j] and j not in forward:
+                forward.add(j)
+                stack.append(j)
+    backward, stack = set(finals), list(finals)
+    while stack:
+        j = stack.pop()
+        for i in range(size):
+            if matrix[i][j] and i not in backward:
+                backward.add(i)
+                stack.append(i)
+    useful = sorted(forward & backward)
+    trimmed = [[matrix[i][j] for j in useful] for i in useful]
+    index = {state: k for k, state in enumerate(useful)}
+    return trimmed, index.get(start), {index[f] for f in finals if f in index}
+
+
+def _count(matrix, start, finals, n, upto=False, mode="exact", modulus=None):
+    # number of words of length n (or 0..n with upto) accepted from `start`
+    if mode == "mod" and not modulus:
+        raise ValueError("mode='mod' needs a modulus")
+    if mode != "mod" and modulus is not None:
+        raise ValueError(f"modulus is only used with mode='mod', not mode={mode!r}")
+    matrix, start, finals = _trim(matrix, start, finals)
+    if n < 0 or start is None:
+        return (0.0, 0) if mode == "float" else 0
+    size = len(matrix)
+    if upto:
+        # extra accumulator state: column `size` of B^(n+1) holds sum of A^i * finals for i <= n
+        matrix = [row + [int(i in finals)] for i, row in enumerate(matrix)] + [[0] * size + [1]]
+        power = _mat_pow(matrix, n + 1, mode, modulus)
+        cells = [size]
+    else:
+        power = _mat_pow(matrix, n, mode, modulus)
+        cells = finals
+    if mode == "float":
+        power, scale = power
+        return _decimal(sum(power[start][f] for f in cells), scale)
+    total = sum(power[start][f] for f in cells)
+    if mode == "mod":
+        return int(total) % modulus
+    return total
+
+
+def _decimal(mantissa, scale):
+    # mantissa * 2**scale as (m, e) with m * 10**e equal to it and 1 <= m < 10
+    if not mantissa:
+        return 0.0, 0
+    try:
+        value = math.ldexp(mantissa, scale)
+    except OverflowError:
+        value = math.inf
+    if value != math.inf:
+        exponent = math.floor(math.log10(value))
+        digits = value / 10.0 ** exponent
+    else:
+        # too large for a float: go through logarithms, the scale itself is an exact python int
+        log = math.log10(mantissa) + scale * math.log10(2)
+        exponent = math.floor(log)
+        digits = 10 ** (log - exponent)
+    # log10 rounding can leave the digits just outside [1, 10)
+    if digits >= 10:
+        digits, exponent = digits / 10, exponent + 1
+    elif digits < 1:
+        digits, exponent = digits * 10, exponent - 1
+    return digits, exponent
+
+
+def _char_poly(matrix):
+    # Faddeev-LeVerrier, exact over the integers: coeffs[j] is the coefficient of x^j in det(xI - A)
+    size = len(matrix)
+    coeffs = [0] * size + [1]
+    m = [[0] * size for _ in range(size)]
+    for i in range(1, size + 1):
+        m = _mat_mul(matrix, m)
+        for d in range(size):
+            m[d][d] += coeffs[size - i + 1]
+        am = _mat_mul(matrix, m)
+        coeffs[size - i] = -sum(am[d][d] for d in range(size)) // i
+    return coeffs
+
+
+def _spectral_radius(matrix, char_poly):
+    if not matrix:
+        return 0.0
+    if np is not None:
+        return float(max(abs(np.linalg.eigvals(np.array(matrix, dtype=np.float64)))))
+    # Durand-Kerner on the (monic) characteristic polynomial
+    degree = len(char_poly) - 1
+    roots = [complex(0.4, 0.9) ** k for k in range(degree)]
+    for _ in range(500):
+        updated = []
+        for i, r in enumerate(roots):
+            value = sum(c * r ** j for j, c in enumerate(char_poly))
+            denominator = 1
+            for k, other in enumerate(roots):
+                if k != i:
+                    denominator *= r - other
+            updated.append(r - value / denominator if denominator else r)
+        converged = max(abs(a - b) for a, b in zip(roots, updated)) < 1e-12
+        roots = updated
+        if converged:
+            break
+    return max(abs(r) for r in roots)
+
+
+def _growth_kind(matrix):
+    # in a trimmed automaton the count grows exponentially iff some state lies on two different
+    # cycles, i.e. a strongly connected component is more than a single simple cycle
+    size = len(matrix)
+    reach = []
+    for i in range(size):
+        seen, stack = set(), [i]
+        while stack:
+            a = stack.pop()
+            for b in range(size):
+                if matrix[a][b] and b not in seen:
+                    seen.add(b)
+                    stack.append(b)
+        reach.append(seen)
+    cyclic = [i for i in range(size) if i in reach[i]]
+    if not cyclic:
+        return "finite"
+    for i in cyclic:
+        component = [j for j in reach[i] if i in reach[j]]
+        if sum(matrix[i][j] for j in component) > 1:
+            return "exponential"
+    return "polynomial"
+
+
+def _growth_summary(matrix, start, finals):
+    # generating function P(z)/Q(z) of the word counts (coefficients lowest degree first) and growth rate
+    matrix, start, finals = _trim(matrix, start, finals)
+    size = len(matrix)
+    char_poly = _char_poly(matrix)
+    # F(z) = sum count(n) z^n = P(z) / Q(z) with Q(z) = det(I - zA) and deg P < size
+    denominator = [char_poly[size - i] for i in range(size + 1)]
+    while len(denominator) > 1 and denominator[-1] == 0:
+        denominator.pop()
+    counts = [_count(matrix, start, finals, n) for n in range(size)]
+    numerator = [sum(denominator[j] * counts[i - j] for j in range(min(i + 1, len(denominator))))
+                 for i in range(size)]
+    while numerator and numerator[-1] == 0:
+        numerator.pop()
+    kind = _growth_kind(matrix)
+    if kind == "finite":
+        rho = 0.0
+    elif kind == "polynomial":
+        rho = 1.0
+    else:
+        rho = _spectral_radius(matrix, char_poly)
+    return {
+        "states": size,
+        "numerator": numerator,
+        "denominator": denominator,
+        "growth_rate": rho,
+        "kind": kind,
+    }
+
+
+class WordCounting:
+    # mixin for the lab automata; _count_matrix() returns (transfer matrix, start index, final indices)
+
+    # number of accepted words of length exactly n; mode and modulus as described at the top of this file
+    def count_words(self, n, mode="exact", modulus=None):
+        return _count(*self._count_matrix(), n, False, mode, modulus)
+
+    # number of accepted words of length 0..n
+    def count_words_upto(self, n, mode="exact", modulus=None):
+        return _count(*self._count_matrix(), n, True, mode, modulus)
+
+    # generating function P(z)/Q(z) of the word counts (coefficients lowest degree first) and growth rate
+    def growth_summary(self):
+        return _growth_summary(*self._count_matrix())
@@ -0,0 +1,274 @@
+import argparse
+import contextlib
+import fnmatch
+import importlib.util
+import io
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+# Benchmarks for all six labs on synthetic inputs of growing size.
+# usage: python bench.py [--only lab6-*] [--quick] [--output results.json]
+#                        [--baseline baseline.json] [--tolerance 0.25]
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_lab(number):
+    # the lab folders are not packages (dash in the name), so load main.py by path
+    path = os.path.join(ROOT, f"Lab-{number}", "main.py")
+    spec = importlib.util.spec_from_file_location(f"lab{number}_main", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def symbol_names(count, base):
+    # the labs treat every character of a production as one symbol, so names must be single characters
+    return [chr(base + i) for i in range(count)]
+
+
+# --- synthetic workloads -------------------------------------------------------------
+
+def random_right_linear_grammar(lab1, rng, size, terminals="abcdeghijk"):
+    non_terminals = symbol_names(size, 0x4E00)
+    productions = {}
+    for nt in non_terminals:
+        firsts = rng.sample(terminals, 3)
+        # every non-terminal can stop, so random derivations always terminate
+        productions[nt] = [firsts[0], firsts[1] + rng.choice(non_terminals), firsts[2] + rng.choice(non_terminals)]
+    grammar = lab1.Grammar.__new__(lab1.Grammar)
+    grammar.VN, grammar.VT, grammar.P, grammar.S = set(non_terminals), set(terminals), productions, non_terminals[0]
+    return grammar
+
+
+def derive_words(grammar, rng, count, length):
+    words = []
+    for _ in range(count):
+        symbol, word = grammar.S, []
+        while True:
+            prods = grammar.P[symbol]
+            prod = prods[0] if len(word) >= length else rng.choice(prods)
+            word.append(prod[0])
+            if len(prod) == 1:
+                break
+            symbol = prod[1]
+        words.append("".join(word))
+    return words
+
+
+def random_nfa(lab2, rng, size, density=1.5, alphabet=("a", "b")):
+    states = [f"q{i}" for i in range(size)]
+    transitions = []
+    for state in states:
+        for symbol in alphabet:
+            # density is the mean number of targets per (state, symbol)
+            targets = max(1, round(rng.expovariate(1 / density)))
+            for to in rng.sample(states, min(targets, size)):
+                transitions.append({"state": state, "symbol": symbol, "to": to})
+    finals = set(rng.sample(states, max(1, size // 4)))
+    return lab2.FiniteAutomaton(set(states), set(alphabet), "q0", finals, transitions)
+
+
+FORMULA_PARTS = ["sin(30)", "cos(45.0)", "tan(1.57)", "3", "4j", "2.5j", "x", "(7.2 - 3j)", "value"]
+
+
+def formula_text(rng, size):
+    parts, total = [], 0
+    while total < size:
+        part = rng.choice(FORMULA_PARTS)
+        parts.append(part)
+        total += len(part) + 3
+    return " + ".join(parts)
+
+
+def random_cfg(lab5, rng, size, terminals="abc"):
+    non_terminals = symbol_names(size, 0x0391)
+    symbols = non_terminals + list(terminals)
+    productions = {}
+    for nt in non_terminals:
+        prods = [rng.choice(terminals)]
+        for _ in range(rng.randint(1, 3)):
+            prods.append("".join(rng.choice(symbols) for _ in range(rng.randint(1, 4))))
+        if rng.random() < 0.2:
+            prods.append("")
+        productions[nt] = list(dict.fromkeys(prods))
+    return lab5.Grammar(set(non_terminals), set(terminals), productions, non_terminals[0])
+
+
+# --- benchmarks ----------------------------------------------------------------------
+# each factory takes (rng, size) and returns a zero-argument callable that does the work
+
+def bench_lab1(lab1):
+    def factory(rng, size):
+        grammar = random_right_linear_grammar(lab1, rng, size)
+        words = derive_words(grammar, rng, 200, 30)
+
+        def run():
+            fa = grammar.to_finite_automaton()
+            for word in words:
+                fa.string_in_language(word)
+        return run
+    return factory
+
+
+def bench_lab2(lab2):
+    def factory(rng, size):
+        nfa = random_nfa(lab2, rng, size)
+        return nfa.convert_to_dfa
+    return factory
+
+
+def bench_lab3_lexer(lab3):
+    def factory(rng, size):
+        text = formula_text(rng, size)
+
+        def run():
+            lexer = lab3.Lexer(text)
+            while lexer.get_next_token().type != lab3.EOF:
+                pass
+        return run
+    return factory
+
+
+def bench_lab4(lab4, family):
+    def factory(rng, size):
+        expr = family * size
+        return lambda: lab4.expand_expression(expr)
+    return factory
+
+
+def bench_lab5(lab5):
+    def factory(rng, size):
+        grammar_seed = rng.random()
+
+        def run():
+            # conversion mutates its grammar, so build a fresh one every run
+            grammar = random_cfg(lab5, random.Random(grammar_seed), size)
+            with contextlib.redirect_stdout(io.StringIO()):
+                lab5.CNFConverter(grammar).convert_to_cnf()
+        return run
+    return factory
+
+
+def bench_lab6_lexer(lab6):
+    def factory(rng, size):
+        text = formula_text(rng, size)
+        return lambda: lab6.tokenize_all(text)
+    return factory
+
+
+def bench_lab6_parser(lab6, parser_cls):
+    def factory(rng, size):
+        text = formula_text(rng, size)
+        return lambda: parser_cls(lab6.Lexer(text)).parse()
+    return factory
+
+
+def build_suite(quick):
+    lab1, lab2, lab3, lab4, lab5, lab6 = (load_lab(n) for n in range(1, 7))
+    text_sizes = [1_000, 10_000, 100_000] if quick else [1_000, 10_000, 100_000, 1_000_000]
+    return [
+        ("lab1-membership", bench_lab1(lab1), [10, 100, 1_000] if quick else [10, 100, 1_000, 10_000]),
+        ("lab2-nfa-to-dfa", bench_lab2(lab2), [4, 8, 12] if quick else [4, 8, 12, 16, 20]),
+        ("lab3-lexer", bench_lab3_lexer(lab3), text_sizes),
+        ("lab4-alternation", bench_lab4(lab4, "(A|B)"), [4, 8, 12] if quick else [4, 8, 12, 16]),
+        ("lab4-star", bench_lab4(lab4, "A*"), [2, 4] if quick else [2, 4, 6]),
+        ("lab5-cnf", bench_lab5(lab5), [5, 10, 20] if quick else [5, 10, 20, 40]),
+        ("lab6-tokenize", bench_lab6_lexer(lab6), text_sizes),
+        ("lab6-parse-recursive", bench_lab6_parser(lab6, lab6.Parser), text_sizes),
+        ("lab6-parse-pratt", bench_lab6_parser(lab6, lab6.PrattParser), text_sizes),
+    ]
+
+
+# --- measurement ---------------------------------------------------------------------
+
+def measure(run, min_time=0.2, max_repeat=20):
+    """Best wall time over repeats, then peak traced memory from one separate run."""
+    best = float("inf")
+    spent, repeats = 0.0, 0
+    while repeats < max_repeat and (repeats == 0 or spent < min_time):
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+        spent += elapsed
+        repeats += 1
+    # tracing slows everything down, so memory is taken from its own run
+    tracemalloc.start()
+    try:
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return best, peak, repeats
+
+
+def run_suite(patterns, quick, seed):
+    results = []
+    for name, factory, sizes in build_suite(quick):
+        if patterns and not any(fnmatch.fnmatch(name, p) for p in patterns):
+            continue
+        for size in sizes:
+            run = factory(random.Random(f"{seed}-{name}-{size}"), size)
+            seconds, peak, repeats = measure(run)
+            results.append({"bench": name, "size": size, "seconds": seconds, "peak_bytes": peak,
+                            "repeats": repeats})
+            print(f"{name:<22}{size:>10}{seconds * 1e3:>12.3f} ms{peak / 1024:>12.1f} KiB", flush=True)
+    return results
+
+
+def find_regressions(results, baseline, tolerance):
+    previous = {(r["bench"], r["size"]): r for r in baseline["results"]}
+    regressions = []
+    for r in results:
+        old = previous.get((r["bench"], r["size"]))
+        if old is None:
+            continue
+        for key in ("seconds", "peak_bytes"):
+            if old[key] and r[key] > old[key] * (1 + tolerance):
+                regressions.append((r["bench"], r["size"], key, old[key], r[key]))
+    return regressions
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Cross-lab benchmark suite.")
+    arg_parser.add_argument("--only", nargs="*", default=[], help="glob patterns of benchmark names")
+    arg_parser.add_argument("--quick", action="store_true", help="smaller input sizes")
+    arg_parser.add_argument("--seed", default="lfa")
+    arg_parser.add_argument("--output", help="save results as JSON")
+    arg_parser.add_argument("--baseline", help="JSON results to compare against")
+    arg_parser.add_argument("--tolerance", type=float, default=0.25,
+                            help="allowed relative slowdown / memory growth before flagging")
+    args = arg_parser.parse_args()
+
+    print(f"{'benchmark':<22}{'size':>10}{'time':>15}{'peak memory':>16}")
+    results = run_suite(args.only, args.quick, args.seed)
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "quick": args.quick,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = find_regressions(results, baseline, args.tolerance)
+        for bench, size, key, old, new in regressions:
+            print(f"REGRESSION {bench} size={size} {key}: {old:.6g} -> {new:.6g} ({new / old:.2f}x)")
+        if regressions:
+            sys.exit(1)
+        print(f"no regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()